@@ -0,0 +1,114 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import rules
+from bitboard import BitboardState
+from engine import EngineState
+from parallel import ParallelSearch, split_root
+from transposition import TranspositionTable
+
+# Runs the AI search in a worker process so the pygame frame loop keeps
+# running while the AI thinks.
+#
+# Positions travel as (size, player 1 bits, player 2 bits) from bitboard.py,
+# a few dozen bytes instead of a pickled NumPy board. Each worker keeps its
+# transposition table between moves; Zobrist keys use a fixed seed, so the
+# entries stay valid. With more than one worker the root is split between
+# them (parallel.py).
+
+_pool = None
+_pool_workers = 0
+_tables = {}
+
+
+def get_pool(workers=1):
+    """The shared search pool with ``workers`` processes, started on first use.
+
+    A pool broken by a worker that died is replaced with a new one.
+    """
+    global _pool, _pool_workers
+    if _pool is not None and (_pool_workers != workers or _pool._broken):
+        shutdown_pool()
+    if _pool is None:
+        # spawn: the worker must not inherit the parent's SDL window.
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _pool_workers = workers
+        for _ in range(workers):
+            _pool.submit(warm_up)
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the worker; a search still running is abandoned"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def warm_up():
+    """Build the lookup tables before the first real search"""
+    EngineState(19)
+
+
+def encode_board(board):
+    """Compact, picklable form of a NumPy board"""
+    bitboard = BitboardState.from_array(board)
+    return board.shape[0], bitboard.bits[1], bitboard.bits[2]
+
+
+def encode_position(position):
+    """encode_board(position.board), read straight from the position's live bitboards"""
+    bits = position.state.bitboard.bits
+    return position.size, bits[1], bits[2]
+
+
+def decode_board(packed):
+    size, bits1, bits2 = packed
+    bitboard = BitboardState(size)
+    bitboard.bits = {1: bits1, 2: bits2}
+    return bitboard.to_array()
+
+
+def search_position(packed, player, stones, remaining, time_limit, mode="turn", turns=None, max_depth=None,
+                    stats=False, engine="minimax", tactics=False, threats=True):
+    """Search a position in the worker. Returns a dict with the chosen turn.
+
+    remaining/time_limit are player's clock in seconds; the budget is taken
+    from them as in TimeManager. Without a time_limit the search runs to
+    max_depth, which makes the result deterministic. With stats the result
+    carries an instrument.py summary under "stats". engine is "minimax"
+    or "mcts", see rules.search. With tactics a forced stone from
+    rules.tactical_move is returned on its own without searching; Connect6
+    checks those itself before it submits a search. threats runs the
+    threat-space solver first; the shares of a split search leave it to
+    plan_position.
+    """
+    position = rules.Position.from_board(decode_board(packed), player, stones)
+    tt = _tables.setdefault(position.size, TranspositionTable())
+    return rules.search(position, remaining, time_limit, mode, max_depth, turns, tt, tactics=tactics, stats=stats,
+                        threats=threats, engine=engine)
+
+
+def plan_position(packed, player, stones, remaining, time_limit, mode="turn"):
+    """The root turns of a split search, worked out in the worker; see rules.plan_root"""
+    position = rules.Position.from_board(decode_board(packed), player, stones)
+    return rules.plan_root(position, remaining, time_limit, mode)
+
+
+def submit_search(packed, player, stones, remaining, time_limit, mode="turn", workers=1, max_depth=None,
+                  stats=False, engine="minimax"):
+    """Start a search on the pool; returns a future-like object with done()/result()"""
+    pool = get_pool(workers)
+    if workers == 1 or engine == "mcts":  # One tree: MCTS is not split across workers
+        return pool.submit(search_position, packed, player, stones, remaining, time_limit, mode,
+                           None, max_depth, stats, engine)
+
+    def submit_shares(plan):
+        left = remaining if remaining is None else max(0.0, remaining - plan["elapsed"])  # The clock ran while planning
+        return [pool.submit(search_position, packed, player, stones, left, time_limit, mode,
+                            share, max_depth, stats, "minimax", False, False)
+                for share in split_root(plan["turns"], workers)]
+
+    plan = pool.submit(plan_position, packed, player, stones, remaining, time_limit, mode)
+    return ParallelSearch(plan, submit_shares, player)
@@ -0,0 +1,57 @@
+from functools import lru_cache
+
+import pygame
+
+# Images, fonts and music shared by MainMenu and Connect6.
+#
+# Everything is loaded on first use and kept for the life of the process,
+# so opening the menu again or starting a rematch does no file I/O and no
+# font lookups. Importing this module (or game.py / menu.py) does not touch
+# pygame at all.
+
+_music = None  # File currently loaded into pygame.mixer.music
+
+
+def init():
+    """pygame.init() once per process"""
+    if not pygame.get_init():
+        pygame.init()
+
+
+@lru_cache(maxsize=None)
+def event_type(name):
+    """A custom pygame event type for name, registered on first use"""
+    return pygame.event.custom_type()
+
+
+@lru_cache(maxsize=None)
+def image(name, size=None):
+    """Load an image, scaled to size (width, height) if given"""
+    init()
+    surface = pygame.image.load(name)
+    if size is not None:
+        surface = pygame.transform.scale(surface, size)
+    return surface
+
+
+@lru_cache(maxsize=None)
+def font(name, size, bold=False):
+    """A system font; the system font list is only scanned once"""
+    init()
+    return pygame.font.SysFont(name, size, bold=bold)
+
+
+def load_music(name, volume=0.5):
+    """Load background music unless that file is already loaded"""
+    global _music
+    init()
+    if _music != name:
+        pygame.mixer.music.load(name)
+        _music = name
+    pygame.mixer.music.set_volume(volume)
+
+
+def unload_music():
+    global _music
+    pygame.mixer.music.unload()
+    _music = None
@@ -0,0 +1,188 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+import kernels
+import rules
+from mcts import MCTS
+from ordering import MoveOrderer
+from search import Searcher
+from transposition import TranspositionTable
+
+# Engine benchmarks over a fixed corpus of 19x19 positions.
+#
+# Reports the latency of the hot engine functions, nodes per second and the
+# time to reach each depth of the iterative deepening search and the MCTS
+# rollouts per second, as JSON.
+# Given a baseline file from an earlier run it exits with status 1 when a
+# metric is worse than the baseline by more than the threshold. Nothing here
+# imports pygame, so it runs on a machine without a display.
+#
+#   python bench.py --output baseline.json
+#   python bench.py --baseline baseline.json --threshold 0.25
+
+# Stones in the order they were played, "x,y" each. The games were random
+# play near the stones with winning moves skipped, so every position is
+# still undecided and has a full turn to move.
+POSITIONS = {
+    "opening": "9,9 11,8 11,11 13,6 7,9 7,8 8,9",
+    "midgame": "9,9 10,8 10,10 8,7 11,8 13,6 6,6 11,9 4,5 11,5 2,3 0,3 9,4 9,6 13,4 6,8 13,10 14,4 13,12 "
+               "10,12 13,5 7,3 6,10 7,7 11,13 12,15 11,2 12,5 12,14 11,11 13,16 3,2 13,11 5,0 13,17 15,17 "
+               "12,8 5,9 3,5 4,10 10,6",
+    "endgame": "9,9 8,8 8,10 6,8 9,12 7,13 10,6 7,10 10,5 11,7 8,4 7,7 5,10 4,12 6,3 5,11 8,5 9,11 13,6 "
+               "9,5 7,3 2,13 8,6 4,9 1,11 8,13 7,14 6,1 8,15 6,9 11,13 9,4 1,13 8,16 6,17 4,1 2,8 8,12 "
+               "12,8 2,7 15,5 3,0 11,2 12,1 14,2 0,9 16,6 1,14 13,9 10,12 3,6 7,0 6,6 4,4 6,13 6,15 "
+               "14,9 11,15 3,12 1,6 0,15 17,8 3,4 6,2 4,3 16,0 11,0 0,11 1,0 16,1 14,10 14,7 2,2 3,2 "
+               "14,1 14,5 5,4 6,14 16,12 18,14 17,1 14,14 2,4 17,3 18,3 18,13 13,4 3,9 7,1 11,14 8,2 "
+               "4,6 0,14 15,1 4,5 7,5 14,11 11,4 15,9 9,13 18,2 18,12 2,11 0,6 6,18 15,7 18,8 8,18 "
+               "15,16 6,11 5,17 0,8 2,16 17,16 17,4 2,15 18,5 4,0 18,6 3,1 12,16",
+}
+
+# Search benchmarks: mode -> deepest depth timed
+SEARCH_DEPTHS = {"turn": 3, "stone": 4}
+MCTS_PLAYOUTS = 4096
+DEFAULT_THRESHOLD = 0.25
+
+
+def load_position(name):
+    """Replay a corpus game into a rules.Position"""
+    position = rules.Position(19)
+    for stone in POSITIONS[name].split():
+        x, y = map(int, stone.split(","))
+        position.place(x, y)
+    return position
+
+
+def latency(fn, repeat=5):
+    """Best mean time per call in microseconds"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def bench_functions(position, repeat):
+    board = position.board
+    state = position.state
+    player = position.turn
+    last = position.history[-1][:2]
+    move = sorted(position.candidate_moves())[0]
+    orderer = MoveOrderer(position.size)
+
+    def make_unmake():
+        state.make(move[0], move[1], player)
+        state.unmake(move[0], move[1])
+
+    functions = {
+        "check_win": lambda: kernels.check_win(board, player),
+        "check_win_bitboard": lambda: state.check_win(player),
+        "check_win_at": lambda: state.check_win_at(last[0], last[1]),
+        "evaluate_board": lambda: kernels.evaluate_board(board),
+        "has_open_five": lambda: kernels.has_open_five(board, player),
+        "has_open_five_bitboard": lambda: state.has_open_five(player),
+        "get_candidate_moves": state.candidate_moves,
+        "order_turns": lambda: orderer.order_turns(state, player, position.stones_left, 0,
+                                                   moves_limit=10, pairs_limit=30),
+        "make_unmake": make_unmake,
+    }
+    return {name: round(latency(fn, repeat), 3) for name, fn in functions.items()}
+
+
+def bench_search(position, mode, max_depth):
+    """Time to each depth of one fixed-depth iterative deepening search"""
+    searcher = Searcher(position.copy().state, TranspositionTable(), mode=mode, max_depth=max_depth)
+    start = time.perf_counter()
+    searcher.search(position.turn, None, stones=position.stones_left)
+    elapsed = time.perf_counter() - start
+    return {"depth": searcher.depth_reached,
+            "time_to_depth_s": [round(it[3], 4) for it in searcher.iterations], "nodes": searcher.nodes,
+            "nodes_per_s": round(searcher.nodes / elapsed) if elapsed else 0}
+
+
+def bench_mcts(position, playouts):
+    """Rollout throughput of a fixed-size MCTS search"""
+    tree = MCTS(position.copy().state, playouts=playouts, seed=0)
+    tree.search(position.turn, position.stones_left)
+    return {"playouts": tree.playouts, "elapsed_s": round(tree.elapsed, 4), "playouts_per_s": tree.playouts_per_s()}
+
+
+def run(names, repeat, depths, playouts=MCTS_PLAYOUTS):
+    results = {}
+    for name in names:
+        position = load_position(name)
+        results[name] = {
+            "stones": len(position.history),
+            "latency_us": bench_functions(position, repeat),
+            "search": {mode: bench_search(position, mode, depth) for mode, depth in depths.items()},
+            "mcts": bench_mcts(position, playouts),
+        }
+        print(f"{name}: done", file=sys.stderr)
+    return {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+
+
+def metrics(report):
+    """Flatten a report to {name: (value, higher_is_better)} for comparison"""
+    flat = {}
+    for name, result in report["results"].items():
+        for function, value in result["latency_us"].items():
+            flat[f"{name}.latency_us.{function}"] = (value, False)
+        for mode, search in result["search"].items():
+            flat[f"{name}.search.{mode}.nodes_per_s"] = (search["nodes_per_s"], True)
+            flat[f"{name}.search.{mode}.time_to_depth_s"] = (search["time_to_depth_s"][-1], False)
+        if "mcts" in result:
+            flat[f"{name}.mcts.playouts_per_s"] = (result["mcts"]["playouts_per_s"], True)
+    return flat
+
+
+def regressions(report, baseline, threshold):
+    """Metrics worse than the baseline by more than threshold (a fraction)"""
+    current = metrics(report)
+    failed = []
+    for key, (old, higher_is_better) in metrics(baseline).items():
+        if key not in current or not old:
+            continue
+        new = current[key][0]
+        change = (old - new) / old if higher_is_better else (new - old) / old
+        if change > threshold:
+            failed.append({"metric": key, "baseline": old, "current": new, "change": round(change, 3)})
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Connect6 engine benchmarks")
+    parser.add_argument("--positions", nargs="+", choices=sorted(POSITIONS), default=list(POSITIONS))
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats per function, best is kept")
+    parser.add_argument("--depth", type=int, help="deepest search depth for both modes")
+    parser.add_argument("--playouts", type=int, default=MCTS_PLAYOUTS, help="MCTS rollouts timed per position")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction, 0.25 = 25%%")
+    args = parser.parse_args(argv)
+
+    depths = dict(SEARCH_DEPTHS)
+    if args.depth:
+        depths = {mode: args.depth for mode in depths}
+    report = run(args.positions, args.repeat, depths, args.playouts)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = regressions(report, json.load(f), args.threshold)
+        report["threshold"] = args.threshold
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for failure in report.get("regressions", []):
+        print(f"REGRESSION {failure['metric']}: {failure['baseline']} -> {failure['current']} "
+              f"({failure['change']:+.0%})", file=sys.stderr)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import numpy as np
+
+from kernels import DIRECTIONS
+
+# Bitboards: one Python int per player.
+#
+# Cell (x, y) is bit x * stride + y with stride = size + 1. The extra column
+# is always empty, so shifting a row or diagonal past the edge of the board
+# lands on an empty guard bit instead of wrapping into the next row. Lines in
+# a direction are then found with shift-and-AND: ``b & (b >> s)`` marks the
+# starts of two in a row, and doubling the shift gives 4 and 6.
+#
+# EngineState keeps a BitboardState in step with its board in make() and
+# unmake() and answers the whole-board checks from it: check_win for
+# Position.check_win and has_open_five for the open five test of
+# rules.tactical_move, one shift-and-AND pass instead of a NumPy scan of the
+# board. ai_worker.py sends positions to the workers as these ints.
+
+
+class BitboardState:
+    def __init__(self, size=19):
+        self.size = size
+        self.stride = size + 1
+        self.bits = {1: 0, 2: 0}
+        self.shifts = [dx * self.stride + dy for dx, dy in DIRECTIONS]
+        self.valid = 0
+        for x in range(size):
+            self.valid |= ((1 << size) - 1) << (x * self.stride)
+
+    @classmethod
+    def from_array(cls, board):
+        """Build a bitboard state from a NumPy board of 0/1/2"""
+        state = cls(board.shape[0])
+        for player in (1, 2):
+            state.bits[player] = state._pack(board == player)
+        return state
+
+    def to_array(self):
+        """NumPy board of 0/1/2, as used by Connect6.board and draw_board"""
+        board = np.zeros((self.size, self.size), dtype=int)
+        for player in (1, 2):
+            board[self._unpack(self.bits[player])] = player
+        return board
+
+    def _pack(self, mask):
+        grid = np.zeros((self.size, self.stride), dtype=bool)
+        grid[:, :self.size] = mask
+        return int.from_bytes(np.packbits(grid.ravel(), bitorder="little").tobytes(), "little")
+
+    def _unpack(self, bits):
+        nbytes = (self.size * self.stride + 7) // 8
+        flat = np.unpackbits(np.frombuffer(bits.to_bytes(nbytes, "little"), dtype=np.uint8),
+                             bitorder="little")
+        return flat[:self.size * self.stride].reshape(self.size, self.stride)[:, :self.size].astype(bool)
+
+    def bit(self, x, y):
+        return 1 << (x * self.stride + y)
+
+    def make(self, x, y, player):
+        self.bits[player] |= self.bit(x, y)
+
+    def unmake(self, x, y):
+        b = ~self.bit(x, y)
+        self.bits[1] &= b
+        self.bits[2] &= b
+
+    def empty(self):
+        return self.valid & ~(self.bits[1] | self.bits[2])
+
+    def check_win(self, player):
+        """Check for 6 or more in a row"""
+        b = self.bits[player]
+        for s in self.shifts:
+            two = b & (b >> s)
+            four = two & (two >> 2 * s)
+            if four & (two >> 4 * s):
+                return True
+        return False
+
+    def has_open_five(self, player):
+        """Same verdict as kernels.has_open_five: five in a row with an empty end"""
+        b = self.bits[player]
+        empty = self.empty()
+        for s in self.shifts:
+            two = b & (b >> s)
+            five = two & (two >> 2 * s) & (b >> 4 * s)
+            if five & ((empty << s) | (empty >> 5 * s)):
+                return True
+        return False
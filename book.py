@@ -0,0 +1,241 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+
+from transposition import zobrist_keys
+
+# Opening book.
+#
+# Positions are keyed by a canonical Zobrist hash: the board is hashed under
+# all 8 symmetries of the square (4 rotations, each mirrored) and the
+# smallest hash is the key. A book move is stored in that canonical
+# orientation and mapped back to the real board on lookup, so one entry
+# covers all 8 mirror images of a position.
+#
+# File layout, little endian:
+#   header  magic "C6BOOK", version u16, board size u16, entry count u32
+#   entries sorted by key, 16 bytes each:
+#           key u64, x1 u8, y1 u8, x2 u8, y2 u8 (255 = no stone), weight u32
+# The file is opened with mmap and searched by bisection, so a lookup reads
+# a handful of pages and the book is never loaded as a whole.
+
+MAGIC = b"C6BOOK"
+VERSION = 1
+HEADER = struct.Struct("<6sHHI")
+ENTRY = struct.Struct("<QBBBBI")
+KEY = struct.Struct("<Q")
+NO_STONE = 255
+BOOK_PATH = "opening.book"
+
+# (x, y) -> symmetric cell on a board with last index n; INVERSE[s] undoes s.
+SYMMETRIES = (
+    lambda x, y, n: (x, y),
+    lambda x, y, n: (n - x, y),
+    lambda x, y, n: (x, n - y),
+    lambda x, y, n: (n - x, n - y),
+    lambda x, y, n: (y, x),
+    lambda x, y, n: (n - y, x),
+    lambda x, y, n: (y, n - x),
+    lambda x, y, n: (n - y, n - x),
+)
+INVERSE = (0, 1, 2, 3, 4, 6, 5, 7)
+
+
+def canonical(board, player):
+    """(key, symmetry) of a position with player to move.
+
+    key is the smallest Zobrist hash over the 8 symmetries and symmetry is
+    the one that produced it.
+    """
+    size = board.shape[0]
+    n = size - 1
+    keys, side = zobrist_keys(size)
+    stones = [(int(x), int(y), int(board[x, y])) for x, y in zip(*board.nonzero())]
+    best = None
+    for s, transform in enumerate(SYMMETRIES):
+        h = side if player == 2 else 0
+        for x, y, p in stones:
+            tx, ty = transform(x, y, n)
+            h ^= keys[p][tx * size + ty]
+        if best is None or h < best[0]:
+            best = (h, s)
+    return best
+
+
+def transform_turn(turn, symmetry, size):
+    """Apply a symmetry to the stones of a turn"""
+    n = size - 1
+    return tuple(sorted(SYMMETRIES[symmetry](x, y, n) for x, y in turn))
+
+
+class OpeningBook:
+    """Read-only view of a book file"""
+
+    def __init__(self, path=BOOK_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError(f"{path} is not an opening book")
+
+    def close(self):
+        self.data.close()
+
+    def _find(self, key):
+        """Entry offset of key, or None"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = HEADER.size + mid * ENTRY.size
+            found = KEY.unpack_from(self.data, offset)[0]
+            if found == key:
+                return offset
+            if found < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def lookup(self, board, player):
+        """The book turn for player on this board as (x, y) moves, or None"""
+        if board.shape[0] != self.size:
+            return None
+        key, symmetry = canonical(board, player)
+        offset = self._find(key)
+        if offset is None:
+            return None
+        _, x1, y1, x2, y2, _ = ENTRY.unpack_from(self.data, offset)
+        stones = [(x1, y1)] if x2 == NO_STONE else [(x1, y1), (x2, y2)]
+        turn = transform_turn(stones, INVERSE[symmetry], self.size)
+        if any(board[x, y] != 0 for x, y in turn):
+            return None  # Hash collision
+        return turn
+
+    def entries(self):
+        """Every (key, turn, weight) in file order"""
+        for k in range(self.count):
+            key, x1, y1, x2, y2, weight = ENTRY.unpack_from(self.data, HEADER.size + k * ENTRY.size)
+            turn = ((x1, y1),) if x2 == NO_STONE else ((x1, y1), (x2, y2))
+            yield key, turn, weight
+
+
+def open_book(path=BOOK_PATH):
+    """The book at path, or None if there is no usable book there"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return OpeningBook(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Error loading opening book: {e}")
+        return None
+
+
+class BookBuilder:
+    """Collects positions and moves, then writes a sorted book file"""
+
+    def __init__(self, size=19):
+        self.size = size
+        self.moves = {}  # key -> {canonical turn: weight}
+
+    def load(self, path):
+        """Add the entries of an existing book"""
+        book = OpeningBook(path)
+        try:
+            for key, turn, weight in book.entries():
+                counts = self.moves.setdefault(key, {})
+                counts[turn] = counts.get(turn, 0) + weight
+        finally:
+            book.close()
+
+    def add(self, board, player, turn, weight=1):
+        """Record that player should answer this board with turn"""
+        key, symmetry = canonical(board, player)
+        counts = self.moves.setdefault(key, {})
+        turn = transform_turn(turn, symmetry, self.size)
+        counts[turn] = counts.get(turn, 0) + weight
+
+    def add_game(self, moves, turns=None, weight=1):
+        """Record the turns of a game given as the list of its stones"""
+        import rules
+
+        position = rules.Position(self.size)
+        stones = []
+        for x, y in moves:
+            if not stones:
+                board, player = position.board.copy(), position.turn
+            stones.append((x, y))
+            position.place(x, y)
+            if position.move_count == 0 or position.winner is not None:
+                self.add(board, player, stones, weight)
+                stones = []
+                if turns is not None and len(self.moves) >= turns:
+                    break
+
+    def write(self, path):
+        """Write the book, keeping the heaviest turn per position"""
+        entries = []
+        for key, counts in self.moves.items():
+            turn = max(sorted(counts), key=counts.get)
+            (x1, y1), (x2, y2) = (turn + ((NO_STONE, NO_STONE),))[:2]
+            entries.append((key, x1, y1, x2, y2, min(counts[turn], 0xFFFFFFFF)))
+        entries.sort()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.size, len(entries)))
+            for entry in entries:
+                f.write(ENTRY.pack(*entry))
+        return len(entries)
+
+
+def self_play(builder, games, turns, depth, seed=0, spread=3):
+    """Fill builder from fixed-depth self-play games.
+
+    Each game runs for turns turns. The first stone is random near the
+    centre and each turn picks among the spread best root turns at random,
+    weighted to the best, so the games branch; the recorded move is the
+    searched best turn.
+    """
+    import rules
+    from search import Searcher
+
+    rng = random.Random(seed)
+    centre = builder.size // 2
+    for _ in range(games):
+        position = rules.Position(builder.size)
+        position.place(centre + rng.randint(-1, 1), centre + rng.randint(-1, 1))
+        for _ in range(turns):
+            if position.game_over:
+                break
+            board, player = position.board.copy(), position.turn
+            best = rules.search(position, max_depth=depth, tactics=True)["turn"]
+            if len(best) == position.stones_left:
+                builder.add(board, player, best)
+            options = Searcher(position.state, mode="turn").root_turns(player, position.stones_left)[:spread]
+            played = best if rng.random() < 0.5 or not options else rng.choice(options)
+            for x, y in played:
+                if position.place(x, y):
+                    break
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a Connect6 opening book from self-play")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=4, help="turns per game after the first stone")
+    parser.add_argument("--depth", type=int, default=2, help="search depth for the book moves")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--merge", help="existing book to add to")
+    parser.add_argument("--output", default=BOOK_PATH)
+    args = parser.parse_args(argv)
+
+    builder = BookBuilder()
+    if args.merge:
+        builder.load(args.merge)
+    self_play(builder, args.games, args.turns, args.depth, args.seed)
+    print(f"{builder.write(args.output)} positions written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import functools
+
+import numpy as np
+
+import kernels
+from bitboard import BitboardState
+from transposition import board_hash, zobrist_keys
+
+# Search-side board state.
+#
+# The evaluation in kernels.py is a sum of one contribution per (cell,
+# direction) window, and a window only spans the cell before its start and
+# the 7 cells from its start onwards. A stone therefore changes at most 8
+# windows per direction, so make()/unmake() recompute just those and keep the
+# total score up to date; reading it at a leaf is free.
+#
+# Cells are mirrored in a flat Python list padded with OFF_BOARD so the
+# window walks need no bounds checks and avoid NumPy scalar indexing.
+#
+# The Zobrist hash of the board, the candidate move frontier (empty cells
+# within distance 2 of a stone) and the bitboards of bitboard.py, which
+# answer the whole-board win and open five checks, are kept up to date the
+# same way.
+
+PAD = 7
+SEARCH_RANGE = 2  # candidate moves are empty cells this close to a stone
+
+
+@functools.lru_cache(maxsize=None)
+def _tables(weights):
+    """kernels' score table and win tables as lists, shared by every state with these weights"""
+    return kernels._score_table(weights).tolist(), {p: kernels._win_table(p).tolist() for p in (1, 2)}
+
+
+class EngineState:
+    def __init__(self, size=19, board=None, weights=None):
+        self.size = size
+        self.weights = weights or kernels.WEIGHTS  # evaluation weights, see kernels.py
+        self.board = np.zeros((size, size), dtype=int) if board is None else board
+        self.width = size + 2 * PAD
+        self.steps = [dx * self.width + dy for dx, dy in kernels.DIRECTIONS]
+        self._score_table, self._win_tables = _tables(self.weights)
+        self.keys, self.side_key = zobrist_keys(size)
+        self.coords = [None] * (self.width * self.width)
+        for x in range(size):
+            row = self.index(x, 0)
+            self.coords[row:row + size] = [(x, y) for y in range(size)]
+        self.neighbours = [dx * self.width + dy
+                           for dx in range(-SEARCH_RANGE, SEARCH_RANGE + 1)
+                           for dy in range(-SEARCH_RANGE, SEARCH_RANGE + 1)
+                           if dx or dy]
+        self._load_board()
+
+    def _load_board(self):
+        """Rebuild the padded cells and all window contributions from self.board"""
+        size, inner = self.size, slice(PAD, PAD + self.size)
+        padded = np.full((self.width, self.width), kernels.OFF_BOARD, dtype=int)
+        padded[inner, inner] = self.board
+        self.cells = padded.ravel().tolist()
+        table = kernels._score_table(self.weights)[kernels.window_codes(self.board)]
+        self.contrib = []
+        for d in range(len(self.steps)):
+            contrib = np.zeros((self.width, self.width), dtype=int)
+            contrib[inner, inner] = table[d]
+            self.contrib.append(contrib.ravel().tolist())
+        self.score = int(table.sum())
+        self.hash = board_hash(self.board)
+        self.bitboard = BitboardState.from_array(self.board)
+        # near[idx]: stones within SEARCH_RANGE of idx; frontier: empty board
+        # cells with near > 0.
+        stones = (self.board != 0).astype(int)
+        near = np.zeros((self.width, self.width), dtype=int)
+        for dx in range(-SEARCH_RANGE, SEARCH_RANGE + 1):
+            for dy in range(-SEARCH_RANGE, SEARCH_RANGE + 1):
+                if dx or dy:
+                    near[PAD + dx:PAD + dx + size, PAD + dy:PAD + dy + size] += stones
+        self.near = near.ravel().tolist()
+        xs, ys = np.nonzero((self.board == 0) & (near[inner, inner] > 0))
+        self.frontier = set(zip(xs.tolist(), ys.tolist()))
+
+    def index(self, x, y):
+        """Position of board cell (x, y) in the padded cell list"""
+        return (x + PAD) * self.width + y + PAD
+
+    def make(self, x, y, player):
+        """Place a stone for the search. Returns True if it makes a six."""
+        self.board[x, y] = player
+        self.hash ^= self.keys[player][x * self.size + y]
+        self.bitboard.make(x, y, player)
+        idx = self.index(x, y)
+        self.frontier.discard((x, y))
+        near, cells, coords = self.near, self.cells, self.coords
+        for offset in self.neighbours:
+            n = idx + offset
+            near[n] += 1
+            if near[n] == 1 and cells[n] == 0:
+                self.frontier.add(coords[n])
+        return self._update(idx, player)
+
+    def unmake(self, x, y):
+        """Take back a stone placed with make()"""
+        idx = self.index(x, y)
+        self.hash ^= self.keys[self.cells[idx]][x * self.size + y]
+        self.board[x, y] = 0
+        self.bitboard.unmake(x, y)
+        self._update(idx, 0)
+        near, coords = self.near, self.coords
+        for offset in self.neighbours:
+            n = idx + offset
+            near[n] -= 1
+            if near[n] == 0:
+                self.frontier.discard(coords[n])
+        if near[idx]:
+            self.frontier.add((x, y))
+
+    def _update(self, idx, value):
+        """Set a cell and recompute the 8 windows per direction that contain it"""
+        cells = self.cells
+        cells[idx] = value
+        table = self._score_table
+        win_table = self._win_tables.get(value)
+        won = False
+        score = self.score
+        for d, step in enumerate(self.steps):
+            contrib = self.contrib[d]
+            # Windows starting 6 cells before idx up to 1 cell after it; the
+            # first one reads from 7 cells before idx.
+            pos = idx - 7 * step
+            code = 0
+            for _ in range(7):
+                code = (code >> 2) | (cells[pos] << 14)
+                pos += step
+            start = idx - 6 * step
+            for k in range(8):
+                code = (code >> 2) | (cells[pos] << 14)
+                pos += step
+                new = table[code]
+                score += new - contrib[start]
+                contrib[start] = new
+                # Only windows starting 5 cells before idx or later hold a
+                # six through idx.
+                if win_table is not None and 1 <= k <= 6 and win_table[code]:
+                    won = True
+                start += step
+        self.score = score
+        return won
+
+    def candidate_moves(self):
+        """Find potential moves near placed pieces"""
+        if not self.frontier:
+            return [(self.size // 2, self.size // 2)]
+        return list(self.frontier)
+
+    def check_win(self, player):
+        """Check for 6 or more in a row anywhere on the board"""
+        return self.bitboard.check_win(player)
+
+    def has_open_five(self, player):
+        """Check for five in a row with an empty cell at either end"""
+        return self.bitboard.has_open_five(player)
+
+    def check_win_at(self, x, y, player=None):
+        """Check for a six on the four lines through (x, y)"""
+        idx = self.index(x, y)
+        if player is None:
+            player = self.cells[idx]
+        if player == 0:
+            return False
+        cells = self.cells
+        for step in self.steps:
+            count = 1
+            pos = idx + step
+            while cells[pos] == player and count < 6:
+                count += 1
+                pos += step
+            pos = idx - step
+            while cells[pos] == player and count < 6:
+                count += 1
+                pos -= step
+            if count >= 6:
+                return True
+        return False
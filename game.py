@@ -1,196 +1,177 @@
-import asyncio
 import pygame
-import numpy as np
-import random
 from pygame import Vector2
 
-from menu import MainMenu
+import ai_worker
+import assets
+import book
+import instrument
+import records
+import rules
+import sounds
+from renderer import BoardRenderer
 
-menu = MainMenu()
-# Initialize Pygame
-pygame.init()
+# Posted from the pool's callback thread when a search finishes, so the
+# event-driven loop in Connect6.run wakes up to place the AI's stones. The
+# event type is registered by Connect6, not at import.
+AI_DONE = "ai_done"
+
+
+def notify_ai_done(future):
+    try:
+        pygame.event.post(pygame.event.Event(assets.event_type(AI_DONE)))
+    except pygame.error:
+        pass  # Display already closed
 
 class Connect6:
-    def __init__(self, size=19, ai_enabled=True, time_limit=300 ,  sound_enabled = True ):  # time_limit in seconds (5 minutes default)
+    def __init__(self, size=19, ai_enabled=True, time_limit=300 ,  sound_enabled = True, backend="bitboard", ai_workers=1,
+                 show_stats=False, stats_log=None, record=None, engine="minimax"):  # time_limit in seconds (5 minutes default)
+        assets.init()
+        assets.event_type(AI_DONE)  # Before the pool's callback thread posts one
         self.size = size
         self.cell_size = 30
         self.screen_width = size * self.cell_size
         self.screen_height = size * self.cell_size + 50
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
         pygame.display.set_caption("Connect6")
-        self.font = pygame.font.SysFont("arial", 24)
-        self.button_font = pygame.font.SysFont("arial", 30)
-        self.winner_font = pygame.font.SysFont("arial", 48, bold=True)
+        self.font = assets.font("arial", 24)
+        self.button_font = assets.font("arial", 30)
+        self.winner_font = assets.font("arial", 48, bold=True)
         self.clock = pygame.time.Clock()
-        self.board = np.zeros((size, size), dtype=int)
+        self.backend = backend  # Whole-board checks of the position: "bitboard", "numpy" or "python", see rules.py
+        self.position = rules.Position(size, backend=backend)  # Board, turn and rules, see rules.py
+        self.search_mode = "turn"  # see search.py
+        self.engine = engine  # "minimax" (search.py) or "mcts" (mcts.py)
+        self.ai_workers = ai_workers  # Processes searching in parallel, see parallel.py
+        self.ai_future = None  # Search running in the worker process
+        self.show_stats = show_stats  # Search stats overlay, toggled with F3
+        self.stats_log = instrument.JsonlLog(stats_log) if stats_log else None
+        self.search_stats = None  # Summary of the AI's last search, see instrument.py
+        self.book = book.open_book()  # Opening book, None if there is no book file; see book.py
         self.players = {1: "X", 2: "O"}
-        self.turn = 1
-        self.move_count = 0
-        self.moves_per_turn = 1
         self.ai_enabled = ai_enabled
         self.status_text = ""
         self.game_over = False
         self.game_state = "playing"
         self.last_placed = []
+        self.ai_pending = []  # Second stone of the AI's searched turn, placed on the next ai_move
         self.time_limit = time_limit
-        self.player1_time = time_limit
-        self.player2_time = time_limit
-        self.last_update_time = pygame.time.get_ticks() / 1000.0
+        self.game_clock = rules.GameClock(time_limit, now=lambda: pygame.time.get_ticks() / 1000.0)
+        self.recorder = records.RecordWriter(record) if record else None  # Appends each game, see records.py
+        self.replaying = False  # Stones come from a record, the clocks show its readings
+        self.start_record()
         self.play_again_rect = pygame.Rect(self.screen_width // 2 - 150, self.screen_height // 2 + 80, 120, 50)
         self.quit_rect = pygame.Rect(self.screen_width // 2 + 30, self.screen_height // 2 + 80, 120, 50)
-        self.loop = asyncio.get_event_loop()
+        self.renderer = BoardRenderer(self)  # Redraws only what changed, see renderer.py
+        if self.ai_enabled:
+            ai_worker.get_pool(ai_workers)  # Start the workers now so the first AI turn does not wait for them
         self.sound_enabled = sound_enabled
-        self.place_sound = self.create_place_sound()
+        sounds.enabled = sound_enabled
+        sounds.bank()  # Built on the first game only, shared after that
         if not self.sound_enabled:
             pygame.mixer.music.stop()
-            pygame.mixer.music.unload()
+            assets.unload_music()
             print(f"Connect6 initialized with sound_enabled={self.sound_enabled}, music stopped, music_busy={pygame.mixer.music.get_busy()}")
         else:
             print(f"Connect6 initialized with sound_enabled={self.sound_enabled}, music continues, music_busy={pygame.mixer.music.get_busy()}")
-            
-            
-            
-    def create_place_sound(self):
-        """Create a sound for placing a piece"""
-        try:
-            freq = 660
-            duration = 0.05
-            sample_rate = 44100
-            t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-            wave = (np.sin(2 * np.pi * freq * t) * 32767).astype(np.int16)
-            stereo_wave = np.column_stack((wave, wave)).flatten().tobytes()
-            return pygame.mixer.Sound(buffer=stereo_wave)
-        except Exception as e:
-            print(f"Error creating place sound: {e}")
-            return None
 
+    # The rules state lives in self.position; these keep the old attribute
+    # names working for the drawing and AI code.
+    @property
+    def state(self):
+        return self.position.state
+
+    @property
+    def board(self):
+        return self.position.board
+
+    @property
+    def turn(self):
+        return self.position.turn
+
+    @property
+    def move_count(self):
+        return self.position.move_count
+
+    @property
+    def moves_per_turn(self):
+        return self.position.moves_per_turn
+
+    @property
+    def player1_time(self):
+        return self.game_clock.remaining[1]
+
+    @player1_time.setter
+    def player1_time(self, value):
+        self.game_clock.remaining[1] = value
+
+    @property
+    def player2_time(self):
+        return self.game_clock.remaining[2]
+
+    @player2_time.setter
+    def player2_time(self, value):
+        self.game_clock.remaining[2] = value
 
     def play_place_sound(self):
         """Play sound when placing a piece"""
-        print(f"play_place_sound: sound_enabled={self.sound_enabled}, music_busy={pygame.mixer.music.get_busy()}")
-        if self.place_sound:
-            self.place_sound.play()
-        else:
-            print("No place sound played (place_sound is None)")
+        sounds.play("ai_move" if self.turn == 2 and self.ai_enabled else "place")
  
+
+    def start_record(self):
+        if self.recorder is not None:
+            self.recorder.start(self.size, self.time_limit)
             
     def reset_game(self):
         """Reset the game state for a new game"""
-        self.board = np.zeros((self.size, self.size), dtype=int)
-        self.turn = 1
-        self.move_count = 0
-        self.moves_per_turn = 1
+        self.position = rules.Position(self.size, backend=self.backend)
+        self.ai_future = None  # A search still running for the old game is ignored
         self.status_text = ""
         self.game_over = False
-        self.player1_time = self.time_limit
-        self.player2_time = self.time_limit
-        self.last_update_time = pygame.time.get_ticks() / 1000.0
+        self.game_clock.reset()
         self.last_placed = []  # Clear highlighted positions for new game
+        self.ai_pending = []
+        self.search_stats = None
+        self.renderer.invalidate()
+        self.start_record()
 
     def draw_board(self):
         """Draw the game board, pieces, timers, and game over screen"""
-        self.screen.fill((255, 255, 255))  # White background
-        
-        # Draw grid with highlights for last placed positions
-        for i in range(self.size):
-            for j in range(self.size):
-                x, y = i * self.cell_size, j * self.cell_size
-                # Highlight cell if it was placed
-                if (i, j) in self.last_placed:
-                    if self.board[i, j] == 1:
-                        pygame.draw.rect(self.screen, (150, 255, 150),  # Green for Player 1
-                                        (x, y, self.cell_size, self.cell_size))
-                    elif self.board[i, j] == 2:
-                        pygame.draw.rect(self.screen, (255, 200, 150),  # Orange for AI
-                                        (x, y, self.cell_size, self.cell_size))
-                # Draw grid lines
-                pygame.draw.rect(self.screen, (0, 0, 0), 
-                               (x, y, self.cell_size, self.cell_size), 1)
-                # Draw pieces
-                if self.board[i, j] == 1:
-                    pygame.draw.circle(self.screen, (0, 0, 0), 
-                                     (x + self.cell_size // 2, y + self.cell_size // 2), 
-                                     self.cell_size // 2 - 5)
-                elif self.board[i, j] == 2:
-                    pygame.draw.circle(self.screen, (255, 255, 255), 
-                                     (x + self.cell_size // 2, y + self.cell_size // 2), 
-                                     self.cell_size // 2 - 5)
-                    pygame.draw.circle(self.screen, (0, 0, 0), 
-                                     (x + self.cell_size // 2, y + self.cell_size // 2), 
-                                     self.cell_size // 2 - 5, 1)
-        
-        # Draw timers and status
-        p1_minutes = int(self.player1_time // 60)
-        p1_seconds = int(self.player1_time % 60)
-        p1_time_text = f"X Time: {p1_minutes:02d}:{p1_seconds:02d}"
-        p1_time_surface = self.font.render(p1_time_text, True, (0, 0, 0))
-        self.screen.blit(p1_time_surface, (10, self.screen_height - 40))
-        
-        p2_minutes = int(self.player2_time // 60)
-        p2_seconds = int(self.player2_time % 60)
-        p2_time_text = f"O Time: {p2_minutes:02d}:{p2_seconds:02d}"
-        p2_time_surface = self.font.render(p2_time_text, True, (0, 0, 0))
-        p2_time_rect = p2_time_surface.get_rect(topright=(self.screen_width - 10, self.screen_height - 40))
-        self.screen.blit(p2_time_surface, p2_time_rect)
-        
-        status_surface = self.font.render(self.status_text, True, (0, 0, 0))
-        status_rect = status_surface.get_rect(center=(self.screen_width // 2, self.screen_height - 40))
-        self.screen.blit(status_surface, status_rect)
-        
-        # Draw game over menu if game is over
-        if self.game_over:
-            # Semi-transparent overlay
-            overlay = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 128))  # Semi-transparent black
-            self.screen.blit(overlay, (0, 0))
-            
-            # Draw winner text (ensure it appears above buttons)
-            if self.status_text:
-                winner_surface = self.winner_font.render(self.status_text, True, (255, 255, 255))
-                winner_rect = winner_surface.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 80))  # Move higher
-                self.screen.blit(winner_surface, winner_rect)
-            else:
-                # Debug: If status_text is empty, show a default message
-                winner_surface = self.winner_font.render("Game Over", True, (255, 255, 255))
-                winner_rect = winner_surface.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 80))
-                self.screen.blit(winner_surface, winner_rect)
-            
-            # Draw buttons
-            pygame.draw.rect(self.screen, (0, 255, 0), self.play_again_rect)  # Green for Play Again
-            pygame.draw.rect(self.screen, (255, 0, 0), self.quit_rect)  # Red for Quit
-            
-            play_again_text = self.button_font.render("Play Again", True, (0, 0, 0))
-            quit_text = self.button_font.render("Quit", True, (0, 0, 0))
-            
-            play_again_rect = play_again_text.get_rect(center=self.play_again_rect.center)
-            quit_rect = quit_text.get_rect(center=self.quit_rect.center)
-            
-            self.screen.blit(play_again_text, play_again_rect)
-            self.screen.blit(quit_text, quit_rect)
-        
-        pygame.display.flip()
+        self.renderer.draw()
+
+    def draw_game_over(self):
+        """Draw the game over overlay with the winner and the menu buttons"""
+        renderer = self.renderer
+        self.screen.blit(renderer.overlay, (0, 0))
+
+        # Draw winner text (ensure it appears above buttons)
+        winner_surface = renderer.text.render(self.winner_font, self.status_text or "Game Over", (255, 255, 255))
+        winner_rect = winner_surface.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 80))  # Move higher
+        self.screen.blit(winner_surface, winner_rect)
+
+        # Draw buttons
+        pygame.draw.rect(self.screen, (0, 255, 0), self.play_again_rect)  # Green for Play Again
+        pygame.draw.rect(self.screen, (255, 0, 0), self.quit_rect)  # Red for Quit
+
+        play_again_text = renderer.text.render(self.button_font, "Play Again", (0, 0, 0))
+        quit_text = renderer.text.render(self.button_font, "Quit", (0, 0, 0))
+
+        play_again_rect = play_again_text.get_rect(center=self.play_again_rect.center)
+        quit_rect = quit_text.get_rect(center=self.quit_rect.center)
+
+        self.screen.blit(play_again_text, play_again_rect)
+        self.screen.blit(quit_text, quit_rect)
 
     def update_timers(self):
         """Update the timers based on whose turn it is"""
-        if self.game_over:
+        if self.game_over or self.replaying:
             return  # Skip timer update if game is over
         
-        current_time = pygame.time.get_ticks() / 1000.0
-        elapsed_time = current_time - self.last_update_time
-        self.last_update_time = current_time
-        
-        if self.turn == 1:
-            self.player1_time -= elapsed_time
-            if self.player1_time <= 0:
-                self.player1_time = 0
-                self.status_text= "Player O wins!"
-                self.game_over = True
-        elif self.turn == 2:
-            self.player2_time -= elapsed_time
-            if self.player2_time <= 0:
-                self.player2_time = 0
-                self.status_text = "Player X wins!"
-                self.game_over = True
+        if self.game_clock.update(self.turn):
+            self.status_text = f"Player {self.players[3 - self.turn]} wins!"
+            self.game_over = True
+            if self.recorder is not None:
+                self.recorder.finish(3 - self.turn, "timeout")
+            sounds.play("timeout")
 
     def handle_click(self, pos):
         """Handle mouse click events during the game"""
@@ -226,253 +207,153 @@ class Connect6:
     
     def place_piece(self, x, y):
         """Place a piece, play sound, check for win, and highlight the cell"""
+        self.update_timers()  # Charge the mover up to this stone
         if self.game_over:
             return
         
-        self.board[x, y] = self.turn
-        self.last_placed.append((x, y))
         self.play_place_sound()
-        self.move_count += 1
+        player = self.turn
+        won = self.position.place(x, y)
+        self.last_placed.append((x, y))
+        if self.recorder is not None:
+            self.recorder.move(x, y, self.game_clock.remaining[player])
         self.draw_board()
         
-        if self.check_win(self.turn):
-            self.status_text = f"Player {self.players[self.turn]} wins!"
+        if won:
+            self.status_text = f"Player {self.players[self.position.winner]} wins!"
             self.game_over = True
+            if self.recorder is not None:
+                self.recorder.finish(player, "six")
+            sounds.play("win")
             self.draw_board()
             return
         
-        if self.move_count >= self.moves_per_turn:
-            self.turn = 3 - self.turn
-            self.move_count = 0
-            self.moves_per_turn = 2
-            if self.turn == 2 and self.ai_enabled:
-                self.status_text = "AI đang suy nghĩ..."
-                self.draw_board()
-                asyncio.run_coroutine_threadsafe(self.ai_move(), self.loop)
-        elif self.turn == 2 and self.ai_enabled:
+        if self.turn == 2 and self.ai_enabled:
             self.status_text = "AI đang suy nghĩ..."
             self.draw_board()
-            asyncio.run_coroutine_threadsafe(self.ai_move(), self.loop)
-
-    async def ai_move(self):
-        """Handle AI move with realistic thinking delay"""
-        self.status_text = "AI đang suy nghĩ..."
-        self.draw_board()  # Update display immediately
-        think_time = random.uniform(0.5, 2.0)  # Random thinking time from 0.5 to 2 seconds
-        await asyncio.sleep(think_time)
-        
-        candidate_moves = self.get_candidate_moves()
-        
-        # 1. Check for immediate AI win
-        for i, j in candidate_moves:
-            self.board[i, j] = 2
-            if self.check_win(2):
-                self.board[i, j] = 0
-                self.place_piece(i, j)
-                self.status_text = "Player O wins!"
-                self.game_over = True  # Explicitly set game_over
-                self.draw_board()  # Ensure board is updated
+
+    def ai_move(self):
+        """Advance the AI's turn; called every frame while it is player 2's turn.
+
+        The search runs in a worker process (ai_worker.py), so this never
+        blocks: it starts a search, or places stones once the search is done.
+        """
+        if self.ai_future is not None:
+            if not self.ai_future.done():
+                return
+            try:
+                result = self.ai_future.result()
+            except Exception as e:
+                # A worker died (BrokenProcessPool) or the search raised:
+                # start a new pool for the next search and move without one.
+                print(f"AI search failed: {e!r}")
+                self.ai_future = None
+                ai_worker.get_pool(self.ai_workers)
+                self.fallback_move()
                 return
-            self.board[i, j] = 0
+            self.ai_future = None
+            if "stats" in result:
+                self.search_stats = result["stats"]
+                instrument.emit(self.search_stats)
+                if self.stats_log is not None:
+                    self.stats_log(self.search_stats)
+            # Charge the thinking time to player 2 before the turn can pass.
+            self.update_timers()
+            if self.game_over:
+                self.draw_board()
+                return
+            best_turn = result["turn"]
+            self.ai_pending = list(best_turn[1:])
+            i, j = best_turn[0]
+            self.place_piece(i, j)
+            self.status_text = ""
+            self.draw_board()  # Ensure board is updated after move
+            return
+
+        # The turn search already chose this stone together with the last one.
+        if self.ai_pending:
+            i, j = self.ai_pending.pop(0)
+            self.place_piece(i, j)
+            self.status_text = ""
+            self.draw_board()
+            return
         
-        # 2. Check for blocking human win
-        for i, j in candidate_moves:
-            self.board[i, j] = 1
-            if self.check_win(1):
-                self.board[i, j] = 2
-                self.place_piece(i, j)
+        # 1-3. Immediate win, block a human six, block a human open five
+        forced = rules.tactical_move(self.position)
+        if forced is not None:
+            (i, j), reason = forced
+            self.place_piece(i, j)
+            if reason == "block_six":
                 self.status_text = "AI blocks human win!"
-                self.draw_board()  # Ensure board is updated
-                return
-            self.board[i, j] = 0
+            elif reason == "block_five":
+                self.status_text = "AI blocks open five!"
+            self.draw_board()  # Ensure board is updated
+            return
         
-        # 3. Block human's open five
-        for i, j in candidate_moves:
-            self.board[i, j] = 1
-            if self.has_open_five(1):
-                self.board[i, j] = 2
+        # 4. A book turn for known openings, no search needed
+        if self.book is not None and self.move_count == 0:
+            book_turn = self.book.lookup(self.board, 2)
+            if book_turn is not None and len(book_turn) == self.moves_per_turn:
+                self.ai_pending = list(book_turn[1:])
+                i, j = book_turn[0]
                 self.place_piece(i, j)
-                self.status_text = "AI blocks open five!"
-                self.draw_board()  # Ensure board is updated
+                self.status_text = ""
+                self.draw_board()
                 return
-            self.board[i, j] = 0
-        
-        # 4. Use Minimax to select optimal move
-        best_score = float('-inf')
-        best_move = None
-        for move in candidate_moves[:10]:  # Limit to 10 moves for speed
-            i, j = move
-            self.board[i, j] = 2
-            score = self.minimax(2, False, float('-inf'), float('inf'))
-            self.board[i, j] = 0
-            if score > best_score:
-                best_score = score
-                best_move = move
-        
-        if best_move:
-            self.place_piece(best_move[0], best_move[1])
-        else:
-            # Fallback to a random move
-            i, j = random.choice(candidate_moves)
-            self.place_piece(i, j)
+
+        # 5. Iterative deepening minimax within this turn's share of the clock,
+        # in the worker process. A turn search picks all remaining stones of
+        # the turn at once.
+        self.ai_future = ai_worker.submit_search(
+            ai_worker.encode_board(self.board), 2, self.moves_per_turn - self.move_count,
+            self.player2_time, self.time_limit, self.search_mode, self.ai_workers,
+            stats=self.show_stats or self.stats_log is not None or instrument.enabled(), engine=self.engine)
+        self.ai_future.add_done_callback(notify_ai_done)
+
+    def fallback_move(self):
+        """Place an AI stone without a search: a forced stone, else the first candidate"""
+        self.update_timers()
+        if self.game_over:
+            self.draw_board()
+            return
+        self.ai_pending = []
+        forced = rules.tactical_move(self.position)
+        i, j = forced[0] if forced is not None else self.position.candidate_moves()[0]
+        self.place_piece(i, j)
         self.status_text = ""
-        self.draw_board()  # Ensure board is updated after move
+        self.draw_board()
 
     def get_candidate_moves(self):
         """Find potential moves near placed pieces"""
-        search_range = 2
-        candidate_moves = set()
-        for i in range(self.size):
-            for j in range(self.size):
-                if self.board[i, j] == 0:
-                    for dx in range(-search_range, search_range + 1):
-                        for dy in range(-search_range, search_range + 1):
-                            ni, nj = i + dx, j + dy
-                            if 0 <= ni < self.size and 0 <= nj < self.size and self.board[ni, nj] != 0:
-                                candidate_moves.add((i, j))
-                                break
-        return list(candidate_moves) if candidate_moves else [(self.size//2, self.size//2)]
-
-    def minimax(self, depth, is_maximizing, alpha, beta):
-        """Minimax algorithm with alpha-beta pruning"""
-        if self.check_win(2):
-            return 10000
-        if self.check_win(1):
-            return -10000
-        if depth == 0:
-            return self.evaluate_board()
-        
-        candidate_moves = self.get_candidate_moves()[:10]
-        
-        if is_maximizing:
-            max_eval = float('-inf')
-            for i, j in candidate_moves:
-                self.board[i, j] = 2
-                eval = self.minimax(depth-1, False, alpha, beta)
-                self.board[i, j] = 0
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for i, j in candidate_moves:
-                self.board[i, j] = 1
-                eval = self.minimax(depth-1, True, alpha, beta)
-                self.board[i, j] = 0
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
-            return min_eval
-
-
-    def evaluate_board(self):
-        """Evaluate the board state"""
-        score = 0
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        for x in range(self.size):
-            for y in range(self.size):
-                if self.board[x, y] == 0:
-                    continue
-                for dx, dy in directions:
-                    count_2, count_1 = 0, 0
-                    open_ends_2, open_ends_1 = 0, 0                
-                    for step in range(6):
-                        nx, ny = x + step * dx, y + step * dy
-                        if 0 <= nx < self.size and 0 <= ny < self.size:
-                            if self.board[nx, ny] == 2:
-                                count_2 += 1
-                            elif self.board[nx, ny] == 1:
-                                count_1 += 1
-                            else:
-                                break
-                        else:
-                            break               
-                    if count_2 > 0:
-                        before_x, before_y = x - dx, y - dy
-                        after_x, after_y = x + count_2 * dx, y + count_2 * dy
-                        if (0 <= before_x < self.size and 0 <= before_y < self.size and self.board[before_x, before_y] == 0):
-                            open_ends_2 += 1
-                        if (0 <= after_x < self.size and 0 <= after_y < self.size and self.board[after_x, after_y] == 0):
-                            open_ends_2 += 1
-                    if count_1 > 0:
-                        before_x, before_y = x - dx, y - dy
-                        after_x, after_y = x + count_1 * dx, y + count_1 * dy
-                        if (0 <= before_x < self.size and 0 <= before_y < self.size and self.board[before_x, before_y] == 0):
-                            open_ends_1 += 1
-                        if (0 <= after_x < self.size and 0 <= after_y < self.size and self.board[after_x, after_y] == 0):
-                            open_ends_1 += 1                  
-                    if count_2 >= 5:
-                        score += 100000
-                    elif count_2 == 4 and open_ends_2 > 0:
-                        score += 10000
-                    elif count_2 == 3 and open_ends_2 > 1:
-                        score += 500
-                    elif count_2 == 2 and open_ends_2 > 1:
-                        score += 3000
-                    
-                    if count_1 >= 5:
-                        score -= 70000
-                    elif count_1 == 4 and open_ends_1 > 0:
-                        score -= 15000
-                    elif count_1 == 3 and open_ends_1 > 1:
-                        score -= 5000
-                    elif count_1 == 2 and open_ends_1 > 1:
-                        score -= 500
-        return score
-
-    def has_open_five(self, player):
-        """Check for open five sequence"""
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        for x in range(self.size):
-            for y in range(self.size):
-                if self.board[x, y] != player:
-                    continue
-                for dx, dy in directions:
-                    count = 1
-                    for step in range(1, 5):
-                        nx, ny = x + step * dx, y + step * dy
-                        if 0 <= nx < self.size and 0 <= ny < self.size and self.board[nx, ny] == player:
-                            count += 1
-                        else:
-                            break
-                    if count == 5:
-                        before_x, before_y = x - dx, y - dy
-                        after_x, after_y = x + 5 * dx, y + 5 * dy
-                        if (0 <= before_x < self.size and 0 <= before_y < self.size and self.board[before_x, before_y] == 0) or \
-                           (0 <= after_x < self.size and 0 <= after_y < self.size and self.board[after_x, after_y] == 0):
-                            return True
-        return False
-
-    def check_win(self, player):
-        """Check for win (6 or more in a row)"""
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        for x in range(self.size):
-            for y in range(self.size):
-                if self.board[x, y] != player:
-                    continue
-                for dx, dy in directions:
-                    count = 1
-                    for step in range(1, 6):
-                        nx, ny = x + step * dx, y + step * dy
-                        if 0 <= nx < self.size and 0 <= ny < self.size and self.board[nx, ny] == player:
-                            count += 1
-                        else:
-                            break
-                    if count >= 6:
-                        return True
-        return False
+        return self.position.candidate_moves()
+
+    def check_win_at(self, x, y, player=None):
+        """Check for win on the four lines through the stone at (x, y).
+
+        Only looks 5 cells each way, so the cost does not depend on the board
+        size. ``player`` defaults to the owner of (x, y).
+        """
+        return self.position.check_win_at(x, y, player)
+
+    def close(self):
+        """Release the files the game keeps open; run() and replay() call this when they return"""
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
     def setup(self):
         """Initialize the game"""
         self.draw_board()
 
-    def update_loop(self):
+    def update_loop(self, events=None):
         """Handle game events and update timers"""
+        if events is None:
+            events = pygame.event.get()
         if self.game_over:
-            for event in pygame.event.get():
+            for event in events:
                 if event.type == pygame.QUIT:
                     return False, "quit"
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -481,39 +362,140 @@ class Connect6:
             self.draw_board()
             return True, "continue"
         else:
-            for event in pygame.event.get():
+            for event in events:
                 if event.type == pygame.QUIT:
                     return False, "quit"
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     self.handle_click(event.pos)
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.show_stats = not self.show_stats
             
             self.update_timers()
+            if self.turn == 2 and self.ai_enabled and not self.game_over:
+                self.ai_move()
             self.draw_board()
             return True, "continue"
 
+    def wake_timeout(self):
+        """Milliseconds the loop may sleep before something changes on its own.
+
+        0 when the AI has work to do right now, None when only input can
+        change anything (game over). Otherwise the time until the running
+        clock shows the next second.
+        """
+        if self.game_over:
+            return None
+        if self.turn == 2 and self.ai_enabled and self.ai_future is None:
+            return 0
+        return max(1, int(self.game_clock.seconds_to_next_tick(self.turn) * 1000) + 1)
+
+    def wait_events(self):
+        """Block until there is input, an AI result or a clock tick"""
+        timeout = self.wake_timeout()
+        if timeout is None:
+            events = [pygame.event.wait()]
+        elif timeout > 0:
+            events = [pygame.event.wait(timeout)]
+        else:
+            events = []
+        return events + pygame.event.get()
+
     def run(self):
-        """Main game loop, returns status when exiting"""
+        """Main game loop, returns status when exiting.
+
+        Event driven: the loop sleeps in pygame.event.wait until input
+        arrives, a search finishes (AI_DONE) or the clock shows a new
+        second, so an idle game uses next to no CPU.
+        """
         if not self.sound_enabled:
             pygame.mixer.music.stop()
-            pygame.mixer.music.unload()
+            assets.unload_music()
             print(f"Game started, sound_enabled={self.sound_enabled}, music stopped, music_busy={pygame.mixer.music.get_busy()}")
         else:
             print(f"Game started, sound_enabled={self.sound_enabled}, music continues, music_busy={pygame.mixer.music.get_busy()}")
         self.setup()
-        running = True
-        while running:
-            continue_game, action = self.update_loop()
-            self.loop.run_until_complete(asyncio.sleep(0))
-            if action == "menu":
-                return "menu"
-            elif action == "quit":
-                return "quit"
-            if continue_game and not self.game_over:
-                self.clock.tick(60)
-            else:
-                self.clock.tick(30)
-        return "quit"
+        try:
+            running = True
+            while running:
+                continue_game, action = self.update_loop(self.wait_events())
+                if action == "menu":
+                    return "menu"
+                elif action == "quit":
+                    return "quit"
+            return "quit"
+        finally:
+            self.close()
+
+    def replay(self, record, speed=1.0):
+        """Play a records.GameRecord back on the board; returns "menu" or "quit".
+
+        Each stone waits its recorded thinking time divided by speed, 0 places
+        them without waiting. Space pauses, Right places the next stone now,
+        Up and Down double and halve the speed, Escape leaves.
+        """
+        self.ai_enabled = False
+        if self.recorder is not None:  # Do not record the replay itself
+            self.recorder.close()
+            self.recorder = None
+        self.replaying = True
+        self.reset_game()
+        try:
+            think_times = record.think_times()
+            index = 0
+            paused = False
+            placed_at = pygame.time.get_ticks()
+            self.draw_board()
+            while True:
+                due = None
+                if index < len(record.moves) and not paused:
+                    delay = think_times[index] * 1000 / speed if speed > 0 else 0
+                    due = placed_at + delay
+                timeout = None if due is None else int(due - pygame.time.get_ticks())
+                if timeout is None:
+                    events = [pygame.event.wait()]
+                elif timeout > 0:
+                    events = [pygame.event.wait(timeout)]
+                else:
+                    events = []
+                for event in events + pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        return "quit"
+                    if event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_ESCAPE:
+                            return "menu"
+                        if event.key == pygame.K_SPACE:
+                            paused = not paused
+                            placed_at = pygame.time.get_ticks()
+                        elif event.key == pygame.K_RIGHT:
+                            placed_at, due = float("-inf"), float("-inf")
+                        elif event.key == pygame.K_UP:
+                            speed *= 2
+                        elif event.key == pygame.K_DOWN:
+                            speed /= 2
+                    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.game_over:
+                        continue_game, action = self.handle_menu_click(event.pos)
+                        if not continue_game:
+                            return action
+                        if not self.game_over:  # Play Again: start the record over
+                            index, paused, placed_at = 0, False, pygame.time.get_ticks()
+                            self.draw_board()
 
+                if due is not None and index < len(record.moves) and pygame.time.get_ticks() >= due:
+                    x, y, clock = record.moves[index]
+                    player = self.turn
+                    self.place_piece(x, y)
+                    self.game_clock.remaining[player] = clock
+                    index += 1
+                    placed_at = pygame.time.get_ticks()
+                    if index == len(record.moves) and not self.game_over:
+                        if record.reason == "timeout":
+                            self.status_text = f"Player {self.players[record.winner]} wins!"
+                            self.game_over = True
+                        else:
+                            self.status_text = "End of record"
+                    self.draw_board()
+        finally:
+            self.close()
 
 # if __name__ == "__main__":
 #     try:
@@ -0,0 +1,178 @@
+import json
+import time
+
+# Search instrumentation.
+#
+# SearchStats.attach() wraps the hot methods of one Searcher, its
+# EngineState, MoveOrderer and TranspositionTable, on that instance only, to
+# count calls and time them. A search without stats runs the plain methods,
+# so instrumentation costs nothing unless it is asked for.
+#
+# A finished search produces a summary dict (see SearchStats.summary; an
+# MCTS search reports its playouts and playouts per second with
+# mcts_summary instead).
+# Summaries are handed to the functions registered with add_hook(), for
+# example a JsonlLog, and Connect6 shows the latest one as an overlay.
+
+# Timed sections: name -> (object attribute on the searcher, method names)
+SECTIONS = {
+    "movegen": ("orderer", ("order_turns", "order_moves")),
+    # make() updates the evaluation and finds a six through the new stone in
+    # the same window walk, so win detection has no section of its own; the
+    # stone mode search's separate check_win_at calls are counted here too.
+    "make": ("state", ("make", "unmake", "check_win_at")),
+}
+
+_hooks = []
+
+
+def add_hook(fn):
+    """Call fn(summary) after every instrumented search"""
+    _hooks.append(fn)
+
+
+def remove_hook(fn):
+    _hooks.remove(fn)
+
+
+def enabled():
+    return bool(_hooks)
+
+
+def emit(summary):
+    for fn in list(_hooks):
+        fn(summary)
+
+
+class SearchStats:
+    """Counters and timers for one search"""
+
+    def __init__(self):
+        self.calls = {name: 0 for name in SECTIONS}
+        self.seconds = {name: 0.0 for name in SECTIONS}
+        self.cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.start = None
+
+    def attach(self, searcher):
+        """Instrument searcher and the objects it uses, for this search only"""
+        for section, (owner, methods) in SECTIONS.items():
+            target = getattr(searcher, owner)
+            for method in methods:
+                setattr(target, method, self._timed(section, getattr(target, method)))
+        record_cutoff = searcher.orderer.record_cutoff
+        probe = searcher.tt.probe
+
+        def counted_cutoff(*args):
+            self.cutoffs += 1
+            return record_cutoff(*args)
+
+        def counted_probe(key):
+            entry = probe(key)
+            self.tt_probes += 1
+            if entry is not None:
+                self.tt_hits += 1
+            return entry
+
+        searcher.orderer.record_cutoff = counted_cutoff
+        searcher.tt.probe = counted_probe
+        self.start = time.perf_counter()
+
+    def detach(self, searcher):
+        """Drop the wrappers again so the instance methods show through"""
+        for owner, methods in SECTIONS.values():
+            target = getattr(searcher, owner)
+            for method in methods:
+                target.__dict__.pop(method, None)
+        searcher.orderer.__dict__.pop("record_cutoff", None)
+        searcher.tt.__dict__.pop("probe", None)
+
+    def _timed(self, section, fn):
+        calls, seconds = self.calls, self.seconds
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                seconds[section] += perf_counter() - start
+                calls[section] += 1
+
+        return timed
+
+    def summary(self, searcher, player=None):
+        """Per-move summary as a JSON-friendly dict"""
+        elapsed = time.perf_counter() - self.start
+        expanded = self.calls["movegen"]
+        return {
+            "player": player,
+            "mode": searcher.mode,
+            "depth": searcher.depth_reached,
+            "nodes": searcher.nodes,
+            "elapsed_s": round(elapsed, 4),
+            "nodes_per_s": round(searcher.nodes / elapsed) if elapsed else 0,
+            "cutoffs": self.cutoffs,
+            "cutoff_rate": round(self.cutoffs / expanded, 3) if expanded else 0.0,
+            "tt_probes": self.tt_probes,
+            "tt_hit_rate": round(self.tt_hits / self.tt_probes, 3) if self.tt_probes else 0.0,
+            "calls": dict(self.calls),
+            "seconds": {name: round(value, 4) for name, value in self.seconds.items()},
+        }
+
+
+def mcts_summary(tree, player=None):
+    """Per-move summary of an mcts.MCTS search, in place of SearchStats.summary"""
+    return {
+        "player": player,
+        "engine": "mcts",
+        "nodes": tree.tree_nodes,
+        "elapsed_s": round(tree.elapsed, 4),
+        "playouts": tree.playouts,
+        "playouts_per_s": tree.playouts_per_s(),
+    }
+
+
+def combine(summaries):
+    """One summary for the parallel searches of a split root"""
+    total = dict(summaries[0])
+    for key in ("nodes", "cutoffs", "tt_probes"):
+        total[key] = sum(s[key] for s in summaries)
+    total["depth"] = min(s["depth"] for s in summaries)
+    total["elapsed_s"] = max(s["elapsed_s"] for s in summaries)
+    total["nodes_per_s"] = round(total["nodes"] / total["elapsed_s"]) if total["elapsed_s"] else 0
+    total["calls"] = {name: sum(s["calls"][name] for s in summaries) for name in SECTIONS}
+    total["seconds"] = {name: round(sum(s["seconds"][name] for s in summaries), 4) for name in SECTIONS}
+    expanded = total["calls"]["movegen"]
+    total["cutoff_rate"] = round(total["cutoffs"] / expanded, 3) if expanded else 0.0
+    hits = sum(s["tt_hit_rate"] * s["tt_probes"] for s in summaries)
+    total["tt_hit_rate"] = round(hits / total["tt_probes"], 3) if total["tt_probes"] else 0.0
+    total["workers"] = len(summaries)
+    return total
+
+
+def overlay_lines(summary):
+    """Short text lines for the stats overlay"""
+    if "playouts" in summary:
+        return [
+            f"mcts  playouts {summary['playouts']}  {summary['playouts_per_s']} p/s",
+            f"time {summary['elapsed_s']:.2f}s  tree nodes {summary['nodes']}",
+        ]
+    seconds = summary["seconds"]
+    return [
+        f"depth {summary['depth']}  nodes {summary['nodes']}  {summary['nodes_per_s']} n/s",
+        f"time {summary['elapsed_s']:.2f}s  cutoffs {summary['cutoff_rate']:.0%}  tt {summary['tt_hit_rate']:.0%}",
+        f"movegen {seconds['movegen']:.2f}s  make/eval/win {seconds['make']:.2f}s",
+    ]
+
+
+class JsonlLog:
+    """Hook that appends every summary to a JSON Lines file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, summary):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(summary) + "\n")
@@ -0,0 +1,175 @@
+import functools
+import os
+import zlib
+
+import numpy as np
+
+# Vectorized versions of the board loops evaluate_board, has_open_five and
+# check_win in reference.py, the "numpy" backend of rules.Position.
+#
+# Every rule looks at a short line starting at an occupied cell:
+# the cell before it, the cell itself and up to 6 cells after it. We lay the
+# rows, columns and both diagonals of the board end to end in one array,
+# separated by "off board" cells, and encode the 8-cell window at every
+# position as a base-4 number with three shift-and-or passes. The result of
+# each rule for a window is then a lookup in a 4^8 entry table.
+#
+# Building a table takes a few milliseconds of NumPy work, ~25 ms for the
+# score table and the win tables together. They are saved to __pycache__
+# next to this file and loaded from there by later processes, so a headless
+# caller (a worker, the server, a benchmark) does not pay for them again.
+
+DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1)]
+OFF_BOARD = 3
+WINDOW = 8  # 1 cell before the start + 7 cells from the start onwards
+
+
+def _digits():
+    """All 4^8 windows as an array of shape (65536, 8), index 0 is the cell before"""
+    codes = np.arange(4 ** WINDOW, dtype=np.int64)
+    return (codes[:, None] >> (2 * np.arange(WINDOW))) & 3
+
+
+TABLE_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+
+
+@functools.lru_cache(maxsize=None)
+def _source_crc():
+    """CRC of this file; a cached table built by other code is stale"""
+    with open(__file__, "rb") as f:
+        return zlib.crc32(f.read())
+
+
+def _disk_cached(build):
+    """Keep the array returned by build in TABLE_CACHE between processes"""
+    @functools.wraps(build)
+    def cached(*args):
+        key = f"{zlib.crc32(repr(args).encode()):08x}{_source_crc():08x}"
+        path = os.path.join(TABLE_CACHE, f"kernels.{build.__name__}.{key}.npy")
+        try:
+            return np.load(path)
+        except (OSError, ValueError):
+            pass
+        table = build(*args)
+        try:
+            os.makedirs(TABLE_CACHE, exist_ok=True)
+            temp = f"{path}.{os.getpid()}"
+            with open(temp, "wb") as f:
+                np.save(f, table)
+            os.replace(temp, path)  # Another process may be reading it
+        except OSError:
+            pass  # Read-only install: build it every time
+        return table
+    return cached
+
+
+# evaluate_board weights as (player, (five, four, three, two)) pairs. Scores
+# are from player 2's view, so player 1's lines count against. A tuple so it
+# can key the table cache; the tournament runner tries other weights.
+WEIGHTS = (
+    (2, (100000, 10000, 500, 3000)),
+    (1, (-70000, -15000, -5000, -500)),
+)
+
+
+@functools.lru_cache(maxsize=None)
+@_disk_cached
+def _score_table(weights=WEIGHTS):
+    """evaluate_board contribution of every window"""
+    d = _digits()
+    before, line = d[:, 0], d[:, 1:]
+    stones = (line == 1) | (line == 2)
+    run = np.logical_and.accumulate(stones[:, :6], axis=1)
+    table = np.zeros(len(d), dtype=np.int64)
+    for player, (five, four, three, two) in weights:
+        count = (run & (line[:, :6] == player)).sum(axis=1)
+        after = np.take_along_axis(line, count[:, None], axis=1)[:, 0]
+        open_ends = (before == 0).astype(np.int64) + (after == 0)
+        table += np.select(
+            [count >= 5, (count == 4) & (open_ends > 0),
+             (count == 3) & (open_ends > 1), (count == 2) & (open_ends > 1)],
+            [five, four, three, two], default=0)
+    table[line[:, 0] == 0] = 0
+    return table
+
+
+@functools.lru_cache(maxsize=None)
+@_disk_cached
+def _win_table(player):
+    """True for windows holding six stones of player from the start cell"""
+    line = _digits()[:, 1:]
+    return (line[:, :6] == player).all(axis=1)
+
+
+@functools.lru_cache(maxsize=None)
+@_disk_cached
+def _open_five_table(player):
+    """True for windows starting with five stones of player and an empty end"""
+    d = _digits()
+    five = (d[:, 1:6] == player).all(axis=1)
+    return five & ((d[:, 0] == 0) | (d[:, 6] == 0))
+
+
+@functools.lru_cache(maxsize=None)
+def _line_layout(size):
+    """Gather indices that lay every line of the board out end to end.
+
+    Returns (gather, starts): ``gather`` indexes a flattened board with one
+    extra OFF_BOARD cell at the end, ``starts[d, x, y]`` is the position of
+    the window for cell (x, y) in direction d in the gathered array.
+    """
+    pad = size * size
+    gather = [pad]
+    starts = np.empty((len(DIRECTIONS), size, size), dtype=np.intp)
+    for d, (dx, dy) in enumerate(DIRECTIONS):
+        heads = [(x, y) for x in range(size) for y in range(size)
+                 if not (0 <= x - dx < size and 0 <= y - dy < size)]
+        for x, y in heads:
+            while 0 <= x < size and 0 <= y < size:
+                starts[d, x, y] = len(gather) - 1
+                gather.append(x * size + y)
+                x, y = x + dx, y + dy
+            gather.extend([pad] * (WINDOW - 2))
+    gather.extend([pad] * WINDOW)
+    return np.array(gather, dtype=np.intp), starts
+
+
+def _line_codes(board):
+    """Window codes for every position of the laid out lines.
+
+    Positions whose start cell is off the board encode to windows that no
+    rule counts, so the rules can be applied to the whole array.
+    """
+    size = board.shape[0]
+    gather, _ = _line_layout(size)
+    flat = np.empty(size * size + 1, dtype=np.uint16)
+    flat[:-1] = board.ravel()
+    flat[-1] = OFF_BOARD
+    lines = flat[gather]
+    codes = lines[:-1] | (lines[1:] << 2)
+    codes = codes[:-2] | (codes[2:] << 4)
+    return codes[:-4] | (codes[4:] << 8)
+
+
+def window_codes(board):
+    """Encode the 8-cell window at every cell in every direction.
+
+    Returns an array of shape (4, size, size) indexed like DIRECTIONS.
+    """
+    _, starts = _line_layout(board.shape[0])
+    return _line_codes(board)[starts]
+
+
+def evaluate_board(board):
+    """Same score as reference.evaluate_board, computed for all cells at once"""
+    return int(_score_table(WEIGHTS)[_line_codes(board)].sum())
+
+
+def has_open_five(board, player):
+    """Same verdict as reference.has_open_five"""
+    return bool(_open_five_table(player)[_line_codes(board)].any())
+
+
+def check_win(board, player):
+    """Same verdict as reference.check_win"""
+    return bool(_win_table(player)[_line_codes(board)].any())
@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import json
+import random
+import signal
+import sys
+import time
+
+import server
+
+# Load generator for server.py.
+#
+# Opens many connections that each play AI games back to back with random
+# stones next to the ones on the board, and times every request from the
+# line sent to the reply received. Prints moves per second (stones placed
+# by both sides) and the latency percentiles as JSON. With --local it
+# starts a server process itself and stops it afterwards.
+#
+#   python loadgen.py --local --clients 500 --duration 30 --depth 1
+
+CENTRE = 9
+SPREAD = 2  # random stones land this close to a stone already played
+
+
+class Client:
+    def __init__(self, host, port, time_limit, rng):
+        self.host = host
+        self.port = port
+        self.time_limit = time_limit
+        self.rng = rng
+        self.latencies = []  # seconds per request
+        self.ai_latencies = []  # requests answered with an AI turn
+        self.stones = 0
+        self.games = 0
+        self.errors = 0
+
+    async def request(self, reader, writer, line):
+        start = time.perf_counter()
+        writer.write(line.encode() + b"\n")
+        await writer.drain()
+        while True:
+            reply = (await reader.readline()).decode().split()
+            if not reply:
+                raise ConnectionError("server closed the connection")
+            if reply[0] != "END":  # A timeout announced on its own; the reply follows
+                break
+        elapsed = time.perf_counter() - start
+        self.latencies.append(elapsed)
+        return reply, elapsed
+
+    def pick(self, taken):
+        """A random empty cell next to the stones on the board"""
+        if not taken:
+            return CENTRE, CENTRE
+        stones = list(taken)
+        for _ in range(100):
+            x, y = self.rng.choice(stones)
+            x += self.rng.randint(-SPREAD, SPREAD)
+            y += self.rng.randint(-SPREAD, SPREAD)
+            if 0 <= x < 19 and 0 <= y < 19 and (x, y) not in taken:
+                return x, y
+        return next((x, y) for x in range(19) for y in range(19) if (x, y) not in taken)
+
+    async def run(self, deadline):
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=server.MAX_LINE)
+        try:
+            while time.perf_counter() < deadline:
+                reply, _ = await self.request(reader, writer, f"NEW ai {self.time_limit}")
+                if reply[0] != "GAME":
+                    self.errors += 1
+                    continue
+                self.games += 1
+                taken = set()
+                over = False
+                while not over and time.perf_counter() < deadline:
+                    x, y = self.pick(taken)
+                    reply, elapsed = await self.request(reader, writer, f"MOVE {x} {y}")
+                    if reply[0] != "OK":
+                        self.errors += 1
+                        break
+                    taken.add((x, y))
+                    self.stones += 1
+                    words = reply[1:]
+                    if words and words[0] == "AI":
+                        self.ai_latencies.append(elapsed)
+                        words = words[1:]
+                        while len(words) >= 2 and words[0] != "END":
+                            taken.add((int(words[0]), int(words[1])))
+                            self.stones += 1
+                            words = words[2:]
+                    over = bool(words) and words[0] == "END"
+            await self.request(reader, writer, "QUIT")
+        finally:
+            writer.close()
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summary(clients, elapsed):
+    latencies = [t for client in clients for t in client.latencies]
+    ai_latencies = [t for client in clients for t in client.ai_latencies]
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "clients": len(clients),
+        "elapsed_s": round(elapsed, 2),
+        "games": sum(client.games for client in clients),
+        "requests": len(latencies),
+        "errors": sum(client.errors for client in clients),
+        "moves_per_s": round(sum(client.stones for client in clients) / elapsed, 1),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "latency_ms": {"p50": ms(percentile(latencies, 0.5)), "p99": ms(percentile(latencies, 0.99)),
+                       "max": ms(max(latencies, default=None))},
+        "ai_latency_ms": {"p50": ms(percentile(ai_latencies, 0.5)), "p99": ms(percentile(ai_latencies, 0.99))},
+    }
+
+
+async def start_local(port, args):
+    """Start server.py in a subprocess and wait until it accepts connections"""
+    command = [sys.executable, server.__file__, "--port", str(port)]
+    if args.workers:
+        command += ["--workers", str(args.workers)]
+    if args.depth:
+        command += ["--depth", str(args.depth)]
+    process = await asyncio.create_subprocess_exec(*command)
+    for _ in range(200):
+        try:
+            _, writer = await asyncio.open_connection(args.host, port)
+            writer.close()
+            return process
+        except OSError:
+            await asyncio.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("local server did not start")
+
+
+async def main_async(args):
+    process = await start_local(args.port, args) if args.local else None
+    try:
+        rng = random.Random(args.seed)
+        clients = [Client(args.host, args.port, args.time_limit, random.Random(rng.random()))
+                   for _ in range(args.clients)]
+        start = time.perf_counter()
+        deadline = start + args.duration
+        results = await asyncio.gather(*(client.run(deadline) for client in clients), return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        failed = [r for r in results if isinstance(r, Exception)]
+        report = summary(clients, elapsed)
+        report["failed_clients"] = len(failed)
+        if failed:
+            print(f"{len(failed)} clients failed, first: {failed[0]!r}", file=sys.stderr)
+        return report
+    finally:
+        if process is not None:
+            process.send_signal(signal.SIGINT)  # The server then stops its AI workers
+            await process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for the Connect6 server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=server.DEFAULT_PORT)
+    parser.add_argument("--clients", type=int, default=100, help="concurrent connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--time-limit", type=int, default=600, help="clock per side of every game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--local", action="store_true", help="start a server for the run")
+    parser.add_argument("--workers", type=int, help="with --local: AI processes")
+    parser.add_argument("--depth", type=int, help="with --local: fixed AI search depth")
+    args = parser.parse_args(argv)
+
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import math
+import time
+
+import numpy as np
+
+from kernels import DIRECTIONS
+from ordering import MoveOrderer
+
+# Monte Carlo tree search (UCT) for Connect6.
+#
+# The tree has one node per stone, so the two stones of a turn are two
+# plies for the same player. A node's children are the best ranked
+# candidate moves from ordering.py, tried best first; children are picked
+# by the UCT formula on the win rate of the player who placed the stone.
+#
+# Rollouts are played in batches as NumPy operations. Each batch selects
+# LEAVES leaves, the visits of a selected path are counted at once (a
+# virtual loss, so the next selection goes elsewhere), and every leaf is
+# played out PER_LEAF times. All boards of the batch advance one stone per
+# step: each board places a random stone next to the stones already there
+# (within SEARCH_RANGE, as the search's candidate moves), and a six is found
+# by gathering the 11 cells around the new stone in each direction. Boards
+# use the padded cell layout of engine.py, so nothing needs bounds checks.
+# A rollout still open after ROLLOUT_STONES stones counts as a draw.
+
+EXPLORATION = 0.7  # UCT exploration constant
+MAX_CHILDREN = 12  # candidate moves per node
+LEAVES = 32  # leaves selected per batch
+PER_LEAF = 8  # rollouts per selected leaf
+ROLLOUT_STONES = 60
+DEFAULT_PLAYOUTS = 20000  # when given neither a time nor a playout budget
+
+
+class Node:
+    __slots__ = ("move", "player", "to_move", "left", "children", "untried", "visits", "wins", "winner")
+
+    def __init__(self, move, player, to_move, left):
+        self.move = move  # (x, y) of the stone that led here
+        self.player = player  # who placed it
+        self.to_move = to_move
+        self.left = left  # stones to_move still places this turn
+        self.children = []
+        self.untried = None  # candidate moves not expanded yet, filled on the first visit
+        self.visits = 0
+        self.wins = 0.0  # for player; a draw counts half
+        self.winner = 0  # set if the stone made a six
+
+    def best_child(self, log_visits):
+        return max(self.children, key=lambda c: c.wins / c.visits + EXPLORATION * math.sqrt(log_visits / c.visits))
+
+
+class MCTS:
+    def __init__(self, state, time_budget=None, playouts=None, seed=None):
+        """Search state (an EngineState) for at most time_budget seconds or
+        playouts rollouts, whichever ends first"""
+        self.state = state
+        self.time_budget = time_budget
+        if playouts is None:
+            playouts = float("inf") if time_budget else DEFAULT_PLAYOUTS
+        self.playouts_limit = playouts
+        self.rng = np.random.default_rng(seed)
+        self.orderer = MoveOrderer(state.size)
+        self.playouts = 0
+        self.elapsed = 0.0
+        self.tree_nodes = 0
+        self._layout()
+
+    def _layout(self):
+        """Index arrays for the padded cell list of the state"""
+        state = self.state
+        width = state.width
+        self.onboard = np.array([idx for idx, coord in enumerate(state.coords) if coord is not None])
+        # Padded index -> column of the candidate mask; off-board cells go to
+        # an extra column that is never set.
+        self.column = np.full(len(state.cells), len(self.onboard))
+        self.column[self.onboard] = np.arange(len(self.onboard))
+        self.neighbours = np.array(state.neighbours)
+        steps = np.array([dx * width + dy for dx, dy in DIRECTIONS])
+        self.lines = steps[:, None] * np.arange(-5, 6)[None, :]  # (4, 11) offsets around a stone
+
+    def playouts_per_s(self):
+        return round(self.playouts / self.elapsed) if self.elapsed else 0
+
+    def search(self, player, stones=2, turns=None):
+        """Return the best turn for player as a tuple of moves.
+
+        turns restricts the root to the given turns, as Searcher.search.
+        """
+        start = time.perf_counter()
+        root = Node(None, 3 - player, player, stones)
+        allowed = None
+        if turns is not None:
+            allowed = {}
+            for turn in turns:
+                allowed.setdefault(turn[0], []).extend(turn[1:])
+            root.untried = list(allowed)
+        self.allowed = allowed
+        self.playouts = 0
+        self.tree_nodes = 1
+        while self.playouts < self.playouts_limit:
+            if self.time_budget is not None and time.perf_counter() - start >= self.time_budget:
+                break
+            if not self.run_batch(root):
+                break
+        self.elapsed = time.perf_counter() - start
+        return self.choose(root, stones)
+
+    def choose(self, root, stones):
+        """The most visited line of the turn"""
+        state = self.state
+        path = [root]
+        node = root
+        for _ in range(stones):
+            if node.children:
+                node = max(node.children, key=lambda c: c.visits)
+            else:
+                # Never visited: take the best ranked move.
+                self.expand(node, path[1:])
+                if not node.untried:
+                    break
+                node = Node(node.untried[-1], node.to_move, node.to_move, 1)
+            path.append(node)
+            state.make(node.move[0], node.move[1], node.player)
+            if node.winner:
+                break
+        for node in reversed(path[1:]):
+            state.unmake(node.move[0], node.move[1])
+        return tuple(sorted(node.move for node in path[1:]))
+
+    def expand(self, node, path):
+        """Fill node.untried with its candidate moves, best last.
+
+        path: the nodes from below the root down to node.
+        """
+        if node.untried is not None:
+            return
+        if self.allowed is not None and len(path) == 1 and node.to_move == node.player \
+                and self.allowed.get(node.move):
+            moves = list(self.allowed[node.move])
+        else:
+            moves = self.orderer.order_moves(self.state, node.to_move, 0, limit=MAX_CHILDREN)
+        node.untried = moves[::-1]
+
+    def select(self, root):
+        """Walk down to a leaf, making its moves on the state.
+
+        Returns the path of nodes from the root; the caller unmakes it.
+        """
+        state = self.state
+        node = root
+        path = [root]
+        while not node.winner:
+            self.expand(node, path[1:])
+            if node.untried:
+                move = node.untried.pop()
+                left = node.left - 1
+                child = Node(move, node.to_move, node.to_move if left else 3 - node.to_move, left or 2)
+                node.children.append(child)
+                self.tree_nodes += 1
+                if state.make(move[0], move[1], child.player):
+                    child.winner = child.player
+                path.append(child)
+                return path
+            if not node.children:
+                return path  # No moves left: the board is full
+            node = node.best_child(math.log(node.visits))
+            state.make(node.move[0], node.move[1], node.player)
+            path.append(node)
+        return path
+
+    def run_batch(self, root):
+        """Select LEAVES leaves, play them out and back up the results.
+
+        Returns False when the root has no moves at all.
+        """
+        state = self.state
+        leaves = []
+        for _ in range(LEAVES):
+            path = self.select(root)
+            leaf = path[-1]
+            for node in path:
+                node.visits += PER_LEAF  # Counted as losses until the results come back
+            if leaf is root:
+                return False
+            if leaf.winner:
+                # Decided: no need to play it out.
+                self.back_up(path, np.full(PER_LEAF, leaf.winner))
+                self.playouts += PER_LEAF
+            else:
+                leaves.append((path, np.array(state.cells, dtype=np.int8)))
+            for node in reversed(path[1:]):
+                state.unmake(node.move[0], node.move[1])
+        if not leaves:
+            return True
+        cells = np.repeat(np.stack([snapshot for _, snapshot in leaves]), PER_LEAF, axis=0)
+        to_move = np.repeat([path[-1].to_move for path, _ in leaves], PER_LEAF)
+        left = np.repeat([path[-1].left for path, _ in leaves], PER_LEAF)
+        winners = self.rollout(cells, to_move, left)
+        for k, (path, _) in enumerate(leaves):
+            self.back_up(path, winners[k * PER_LEAF:(k + 1) * PER_LEAF])
+        self.playouts += len(winners)
+        return True
+
+    def back_up(self, path, winners):
+        """Add the rollout results (winner per rollout, 0 for a draw) to a path"""
+        draws = np.count_nonzero(winners == 0) * 0.5
+        wins = {1: np.count_nonzero(winners == 1) + draws, 2: np.count_nonzero(winners == 2) + draws}
+        for node in path:
+            node.wins += wins[node.player]
+
+    def rollout(self, cells, to_move, left):
+        """Play random local stones on every board at once.
+
+        cells: (boards, padded cells) int8, changed in place. to_move and
+        left: the player to move and the stones left in their turn per
+        board. Returns the winner per board, 0 if none.
+        """
+        boards = len(cells)
+        rows = np.arange(boards)
+        stones = (cells == 1) | (cells == 2)
+        near = np.zeros((boards, len(self.onboard) + 1), dtype=bool)
+        for offset in self.neighbours:
+            near[:, :-1] |= np.roll(stones, offset, axis=1)[:, self.onboard]
+        near[:, :-1] &= cells[:, self.onboard] == 0
+        winners = np.zeros(boards, dtype=np.int8)
+        active = near.any(axis=1)
+        player = to_move.astype(np.int8)
+        left = left.copy()
+        for _ in range(ROLLOUT_STONES):
+            # A random candidate per board: the largest random key among them.
+            keys = self.rng.random(near.shape, dtype=np.float32)
+            keys[~near] = -1.0
+            choice = keys.argmax(axis=1)
+            active &= near[rows, choice]
+            live = rows[active]
+            if not len(live):
+                break
+            idx = self.onboard[choice[live]]
+            mover = player[live]
+            cells[live, idx] = mover
+
+            near[live, choice[live]] = False
+            around = idx[:, None] + self.neighbours[None, :]
+            near[live[:, None], self.column[around]] = cells[live[:, None], around] == 0
+            near[:, -1] = False
+
+            line = cells[live[:, None, None], idx[:, None, None] + self.lines[None]] == mover[:, None, None]
+            runs = np.cumsum(line, axis=2)
+            six = (runs[:, :, 5:] - np.pad(runs, ((0, 0), (0, 0), (1, 0)))[:, :, :6]) == 6
+            won = six.any(axis=(1, 2))
+            winners[live[won]] = mover[won]
+            active[live[won]] = False
+
+            left[live] -= 1
+            done = live[left[live] == 0]
+            player[done] = 3 - player[done]
+            left[done] = 2
+        return winners
@@ -2,6 +2,8 @@ import pygame
 import numpy as np
 import sys
 
+import assets
+
 # Constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
@@ -21,13 +23,12 @@ TITLE_COLOR = (25, 118, 210)
 
 class MainMenu:
     def __init__(self):
-        pygame.init()
-        self.background = pygame.image.load("image.jpg")
-        self.background = pygame.transform.scale(self.background, (SCREEN_WIDTH, SCREEN_HEIGHT))
+        assets.init()
+        self.background = assets.image("image.jpg", (SCREEN_WIDTH, SCREEN_HEIGHT))
 
-        self.font = pygame.font.SysFont("Segoe UI", FONT_SIZE, bold=True)
-        self.title_font = pygame.font.SysFont("Segoe UI", TITLE_FONT_SIZE, bold=True)
-        self.instruction_font = pygame.font.SysFont("Segoe UI", 20)
+        self.font = assets.font("Segoe UI", FONT_SIZE, bold=True)
+        self.title_font = assets.font("Segoe UI", TITLE_FONT_SIZE, bold=True)
+        self.instruction_font = assets.font("Segoe UI", 20)
         self.buttons = []
         self.sound_enabled = True
         self.setup_menu()
@@ -37,8 +38,7 @@ class MainMenu:
     def load_background_music(self):
         """Load and play background music if sound is enabled"""
         try:
-            pygame.mixer.music.load("intro.mp3")  # Thay bằng đường dẫn thực tế
-            pygame.mixer.music.set_volume(0.5)
+            assets.load_music("intro.mp3")  # Thay bằng đường dẫn thực tế
             if self.sound_enabled:
                 pygame.mixer.music.play(-1)
                 print(f"Background music started, sound_enabled={self.sound_enabled}")
@@ -52,7 +52,7 @@ class MainMenu:
         if pygame.mixer.music.get_busy():
             pygame.mixer.music.stop()
             print("Background music stopped")
-        pygame.mixer.music.unload()
+        assets.unload_music()
         print("Background music unloaded")
 
     def toggle_sound(self):
@@ -61,8 +61,7 @@ class MainMenu:
         self.needs_redraw = True
         if self.sound_enabled:
             try:
-                pygame.mixer.music.load("intro.mp3")
-                pygame.mixer.music.set_volume(0.5)
+                assets.load_music("intro.mp3")
                 pygame.mixer.music.play(-1)
                 print(f"Background music restarted, sound_enabled={self.sound_enabled}")
             except Exception as e:
@@ -107,17 +106,14 @@ class MainMenu:
             y += 50
         pygame.display.flip()
 
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type in [pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN]:
-                    waiting = False
+        # Sleep until the player dismisses the page instead of polling.
+        while pygame.event.wait().type not in [pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN]:
+            pass
 
         self.needs_redraw = True
         if self.sound_enabled:
             try:
-                pygame.mixer.music.load("intro.mp3")
-                pygame.mixer.music.set_volume(0.5)
+                assets.load_music("intro.mp3")
                 pygame.mixer.music.play(-1)
                 print("Background music restarted after instructions")
             except Exception as e:
@@ -0,0 +1,129 @@
+from itertools import combinations
+
+from kernels import OFF_BOARD
+
+# Move ordering for the minimax search.
+#
+# Alpha-beta only prunes well when good moves are searched first, and the
+# searcher only looks at the first few candidates of each node. Candidates
+# are ordered by
+#   1. the transposition table's best move for the position,
+#   2. killer moves: moves that caused a cutoff at the same ply elsewhere,
+#   3. the history table: how often a cell caused cutoffs, weighted by depth,
+#   4. a static pre-score from the 6-cell windows through the cell.
+
+# Indexed by the number of the player's stones in a window after playing
+# there (1-6) and by the number of opponent stones the move blocks (0-5).
+ATTACK = (0, 1, 4, 16, 64, 5000, 10 ** 7)
+DEFENCE = (0, 1, 3, 12, 2000, 10 ** 6)
+WINNING = ATTACK[6]
+KILLERS_PER_PLY = 2
+
+
+class MoveOrderer:
+    def __init__(self, size):
+        self.size = size
+        self.history = {1: [0] * (size * size), 2: [0] * (size * size)}
+        self.killers = {}
+
+    def new_search(self):
+        """Forget killers and age the history before a new search"""
+        self.killers = {}
+        for table in self.history.values():
+            for k, value in enumerate(table):
+                if value:
+                    table[k] = value >> 1
+
+    def static_score(self, state, i, j, player):
+        """Score a stone from the 6-cell windows through (i, j).
+
+        A window free of opponent stones counts as attack, one free of the
+        player's stones as defence. A window that the stone fills with six
+        of the player's stones makes the score at least WINNING.
+        """
+        cells = state.cells
+        idx = state.index(i, j)
+        opponent = 3 - player
+        score = 0
+        for step in state.steps:
+            line = [cells[idx + k * step] for k in range(-5, 6)]
+            # counts[v]: cells holding v in the current window, slid along
+            # the 6 windows through idx.
+            counts = [0, 0, 0, 0]
+            for v in line[:6]:
+                counts[v] += 1
+            for start in range(6):
+                if start:
+                    counts[line[start - 1]] -= 1
+                    counts[line[start + 5]] += 1
+                if counts[OFF_BOARD]:
+                    continue
+                own = counts[player]
+                theirs = counts[opponent]
+                if theirs == 0:
+                    score += ATTACK[own + 1]
+                elif own == 0:
+                    score += DEFENCE[theirs]
+        return score
+
+    def rank_moves(self, state, player):
+        """Candidate moves for player as (score, move) pairs, best first"""
+        history = self.history[player]
+        size = self.size
+        moves = state.frontier or state.candidate_moves()
+        ranked = [(self.static_score(state, i, j, player) + history[i * size + j], (i, j))
+                  for i, j in moves]
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked
+
+    def order_moves(self, state, player, ply, tt_move=None, limit=None):
+        """Single-stone candidates for player, best first, cut to limit"""
+        moves = [move for _, move in self.rank_moves(state, player)]
+        return self._promote(moves, ply, tt_move, state)[:limit]
+
+    def order_turns(self, state, player, stones, ply, tt_turn=None, moves_limit=None, pairs_limit=None):
+        """Candidate turns of one or two stones for player, best first.
+
+        Pairs are built from the top moves_limit single stones. A stone that
+        wins on its own is returned as the only turn.
+        """
+        ranked = self.rank_moves(state, player)
+        if ranked and ranked[0][0] >= WINNING:
+            return [(ranked[0][1],)]
+        best = [move for _, move in ranked[:moves_limit]]
+        if stones == 1 or len(best) < 2:
+            turns = [(move,) for move in best]
+        else:
+            # Pairs of the best ranked stones first.
+            pairs = sorted(combinations(range(len(best)), 2), key=lambda pair: pair[0] + pair[1])
+            turns = [tuple(sorted((best[a], best[b]))) for a, b in pairs[:pairs_limit]]
+        return self._promote(turns, ply, tt_turn, state)
+
+    def _promote(self, moves, ply, tt_move, state):
+        """Move the TT move and the killers of this ply to the front"""
+        front = []
+        if tt_move is not None and self._legal(tt_move, state):
+            front.append(tt_move)
+        for killer in self.killers.get(ply, ()):
+            if killer not in front and self._legal(killer, state):
+                front.append(killer)
+        if not front:
+            return moves
+        return front + [move for move in moves if move not in front]
+
+    def _legal(self, move, state):
+        """Whether a move (or every stone of a turn) is on an empty cell"""
+        stones = move if isinstance(move[0], tuple) else (move,)
+        return all(state.cells[state.index(i, j)] == 0 for i, j in stones)
+
+    def record_cutoff(self, move, player, ply, depth):
+        """Remember a move (or turn) that caused a beta cutoff"""
+        killers = self.killers.setdefault(ply, [])
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[KILLERS_PER_PLY:]
+        stones = move if isinstance(move[0], tuple) else (move,)
+        history = self.history[player]
+        for i, j in stones:
+            history[i * self.size + j] += depth * depth
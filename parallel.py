@@ -0,0 +1,131 @@
+import threading
+
+import instrument
+from search import WIN_BOUND
+
+# Parallel root search.
+#
+# The root turns are dealt round-robin to the workers of a process pool and
+# every worker runs its own iterative deepening over its share with the same
+# time budget. The root is searched with a full window per turn, so scores
+# from different workers at the same depth are exact minimax values and can
+# be compared directly; the merge step picks the best turn at the deepest
+# depth every worker finished. Workers keep their own transposition tables.
+# The root list and the threat-space solver (threats.py) come from one
+# planning task on the pool before the shares start, so neither the
+# process asking for the search nor every share repeats that work.
+
+
+def split_root(turns, workers):
+    """Deal the root turns to at most ``workers`` non-empty shares, keeping order"""
+    shares = [turns[k::workers] for k in range(workers)]
+    return [share for share in shares if share]
+
+
+def merge_results(results, player, turns):
+    """Combine per-worker search results into one.
+
+    results: dicts from ai_worker.search_position, each with "iterations"
+    (depth, best_turn, score, elapsed) and "nodes". turns: the full root list, used
+    to break ties by the original order so the merge is deterministic.
+    """
+    sign = 1 if player == 2 else -1
+    order = {turn: k for k, turn in enumerate(turns)}
+    nodes = sum(result["nodes"] for result in results)
+    iterations = [result["iterations"] for result in results if result["iterations"]]
+    if not iterations:
+        return {"turn": turns[0], "depth": 0, "nodes": nodes}
+
+    # A forced win found by any worker ends the search, fastest win first
+    # (win scores drop by one per ply). Wins from the threat solver
+    # (threats.py) may lie outside the root list.
+    wins = [(-score * sign, depth, order.get(turn, -1), turn) for its in iterations for depth, turn, score, _ in its
+            if score * sign >= WIN_BOUND]
+    if wins:
+        _, depth, _, turn = min(wins)
+        return {"turn": turn, "depth": depth, "nodes": nodes}
+
+    # Workers stop early once all their turns lose; a loss stays a loss at
+    # any greater depth, so they do not limit the common depth.
+    alive = [its for its in iterations if its[-1][2] * sign > -WIN_BOUND]
+    common = min(its[-1][0] for its in alive) if alive else max(its[-1][0] for its in iterations)
+    best = None
+    for its in iterations:
+        depth, turn, score, _ = [it for it in its if it[0] <= common][-1]
+        key = (-score * sign, order.get(turn, -1))
+        if best is None or key < best[0]:
+            best = (key, turn)
+    return {"turn": best[1], "depth": common, "nodes": nodes}
+
+
+class ParallelSearch:
+    """Future-like handle over one parallel root search.
+
+    The search runs in two steps on the pool: a planning task that finds
+    the root turns (rules.plan_root), then one task per share of them,
+    started by submit_shares(plan) from the planning task's callback. The
+    process that asks for the search does no engine work at all.
+    """
+
+    def __init__(self, plan_future, submit_shares, player):
+        self.player = player
+        self.submit_shares = submit_shares
+        self.plan = None
+        self.futures = []
+        self.error = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._finished = False
+        self._callbacks = []
+        plan_future.add_done_callback(self._planned)
+
+    def _planned(self, future):
+        try:
+            self.plan = future.result()
+            if self.plan["win"] is None:
+                self.futures = self.submit_shares(self.plan)
+        except Exception as e:
+            self.error = e
+        if self.error is not None or not self.futures:
+            self._finish()
+            return
+        self._pending = len(self.futures)
+        for share in self.futures:
+            share.add_done_callback(self._share_done)
+
+    def _share_done(self, _):
+        with self._lock:
+            self._pending -= 1
+            last = self._pending == 0
+        if last:
+            self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._finished = True
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(self)
+
+    def done(self):
+        return self._finished
+
+    def add_done_callback(self, fn):
+        """Call fn(self) once the whole search has finished, like Future.add_done_callback"""
+        with self._lock:
+            if not self._finished:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        if self.plan["win"] is not None:
+            return self.plan["win"]
+        results = [future.result() for future in self.futures]
+        merged = merge_results(results, self.player, self.plan["turns"])
+        merged["threat_nodes"] = self.plan["threat_nodes"]
+        if all("stats" in result for result in results):
+            merged["stats"] = instrument.combine([result["stats"] for result in results])
+        return merged
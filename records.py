@@ -0,0 +1,210 @@
+import argparse
+import os
+import struct
+
+# Game records.
+#
+# A record file is a stream of games, each a fixed header followed by one
+# fixed-size entry per stone, little endian:
+#   header  magic "C6", version u8, board size u8, winner u8 (0 = none),
+#           reason u8 (index into REASONS), time limit u16 (seconds),
+#           stones u32
+#   stone   x u8, y u8, the mover's clock after the stone u16 (tenths of a
+#           second)
+# RecordWriter appends a game while it is played and rewrites that game's
+# header after every stone, so the file is complete up to the last stone
+# even if the program dies mid-game. A game's header is only written with
+# its first stone (or its result), so a game that never got a stone leaves
+# nothing behind. Because every header holds its stone count, RecordReader
+# finds the games by hopping from header to header and reads a game's stones
+# only when that game is asked for. When RecordWriter opens a file it cuts
+# off anything after the last complete game (a write cut short by a crash)
+# so the games it appends can be found the same way.
+#
+# Nothing here imports pygame; replaying a record on screen is
+# Connect6.replay, started from the command line:
+#   python records.py games.c6r                 list the games
+#   python records.py games.c6r --game 3 -s 4   replay game 3 at 4x speed
+
+MAGIC = b"C6"
+VERSION = 1
+HEADER = struct.Struct("<2sBBBBHI")
+STONE = struct.Struct("<BBH")
+REASONS = ("unfinished", "six", "timeout")
+RECORD_PATH = "games.c6r"
+
+
+class GameRecord:
+    """One recorded game: its header fields and (x, y, clock) per stone"""
+
+    def __init__(self, size, time_limit, winner=0, reason="unfinished", moves=None):
+        self.size = size
+        self.time_limit = time_limit
+        self.winner = winner  # 0 when nobody won
+        self.reason = reason
+        self.moves = moves if moves is not None else []  # (x, y, mover's clock in seconds)
+
+    def think_times(self):
+        """Seconds each stone took, from the clock readings"""
+        import rules
+
+        position = rules.Position(self.size)
+        last = {1: self.time_limit, 2: self.time_limit}
+        times = []
+        for x, y, clock in self.moves:
+            player = position.turn
+            times.append(max(0.0, last[player] - clock))
+            last[player] = clock
+            position.place(x, y)
+        return times
+
+    def summary(self):
+        result = f"player {self.winner} wins by {self.reason}" if self.winner else self.reason
+        return f"{self.size}x{self.size}, {self.time_limit}s, {len(self.moves)} stones, {result}"
+
+
+class RecordWriter:
+    """Appends games to a record file as they are played"""
+
+    def __init__(self, path=RECORD_PATH):
+        self.path = path
+        self.file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        self.game = None  # The game being written
+        self.header_offset = None  # Where it starts, None until its header is written
+        self._drop_torn_tail()
+
+    def _drop_torn_tail(self):
+        """Truncate the file after its last complete game"""
+        end = self.file.seek(0, os.SEEK_END)
+        offset = 0
+        while offset + HEADER.size <= end:
+            self.file.seek(offset)
+            magic, version, _, _, _, _, stones = HEADER.unpack(self.file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION or offset + HEADER.size + stones * STONE.size > end:
+                break
+            offset += HEADER.size + stones * STONE.size
+        if offset < end:
+            print(f"{self.path}: dropping {end - offset} bytes after the last complete game")
+            self.file.truncate(offset)
+
+    def start(self, size, time_limit):
+        """Begin a new game; nothing is written before its first stone"""
+        self.game = GameRecord(size, time_limit)
+        self.header_offset = None
+        self.stones = 0
+
+    def move(self, x, y, clock):
+        """Record a stone and the mover's remaining clock in seconds"""
+        if self.game is None:
+            return
+        if self.header_offset is None:
+            # The stone goes in first, so a crash before the header is
+            # written leaves a torn tail, not an empty game.
+            self.header_offset = self.file.seek(0, os.SEEK_END)
+            self.file.seek(self.header_offset + HEADER.size)
+        else:
+            self.file.seek(0, os.SEEK_END)
+        self.file.write(STONE.pack(x, y, min(max(round(clock * 10), 0), 0xFFFF)))
+        self.stones += 1
+        self._write_header()
+
+    def finish(self, winner, reason):
+        """Store the result; later stones are not recorded"""
+        if self.game is None:
+            return
+        if self.header_offset is None:  # Lost on time before the first stone
+            self.header_offset = self.file.seek(0, os.SEEK_END)
+        self.game.winner = winner
+        self.game.reason = reason
+        self._write_header()
+        self.game = None
+        self.header_offset = None
+
+    def close(self):
+        self.file.close()
+
+    def _write_header(self):
+        game = self.game
+        self.file.seek(self.header_offset)
+        self.file.write(HEADER.pack(MAGIC, VERSION, game.size, game.winner, REASONS.index(game.reason),
+                                    min(game.time_limit, 0xFFFF), self.stones))
+        self.file.flush()
+
+
+class RecordReader:
+    """Random access to the games of a record file"""
+
+    def __init__(self, path=RECORD_PATH):
+        self.path = path
+        self.file = open(path, "rb")
+        self.offsets = []  # Header offset of each game
+        self.refresh()
+
+    def refresh(self):
+        """Pick up games appended since the file was last scanned"""
+        end = self.file.seek(0, os.SEEK_END)
+        offset = self.offsets.pop() if self.offsets else 0  # The last game may have grown
+        while offset + HEADER.size <= end:
+            self.file.seek(offset)
+            magic, version, _, _, _, _, stones = HEADER.unpack(self.file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{self.path}: no game record at byte {offset}")
+            self.offsets.append(offset)
+            offset += HEADER.size + stones * STONE.size
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index):
+        return self.game(index)
+
+    def __iter__(self):
+        for index in range(len(self.offsets)):
+            yield self.game(index)
+
+    def game(self, index):
+        """Read one game, seeking straight to it"""
+        self.file.seek(self.offsets[index])
+        _, _, size, winner, reason, time_limit, stones = HEADER.unpack(self.file.read(HEADER.size))
+        data = self.file.read(stones * STONE.size)
+        stones = len(data) // STONE.size  # A stone cut off mid-write is dropped
+        moves = [(x, y, clock / 10) for x, y, clock in STONE.iter_unpack(data[:stones * STONE.size])]
+        return GameRecord(size, time_limit, winner, REASONS[reason], moves)
+
+    def close(self):
+        self.file.close()
+
+
+def replay(record, speed=1.0):
+    """Show a record in a Connect6 window; returns "menu" or "quit" """
+    import pygame
+
+    import assets
+    from game import Connect6
+
+    assets.init()
+    game = Connect6(size=record.size, ai_enabled=False, time_limit=record.time_limit)
+    try:
+        return game.replay(record, speed)
+    finally:
+        pygame.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or replay Connect6 game records")
+    parser.add_argument("path", nargs="?", default=RECORD_PATH)
+    parser.add_argument("--game", type=int, help="replay this game (0 is the first, -1 the last)")
+    parser.add_argument("-s", "--speed", type=float, default=1.0,
+                        help="replay speed as a multiple of the recorded thinking time, 0 for no delay")
+    args = parser.parse_args(argv)
+
+    reader = RecordReader(args.path)
+    if args.game is None:
+        for index in range(len(reader)):
+            print(f"{index}: {reader.game(index).summary()}")
+        return
+    replay(reader.game(args.game), args.speed)
+
+
+if __name__ == "__main__":
+    main()
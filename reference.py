@@ -0,0 +1,107 @@
+from kernels import DIRECTIONS
+
+# The board loops evaluate_board, has_open_five and check_win as they were
+# in game.py before kernels.py: every occupied cell, every direction, one
+# NumPy element at a time. rules.Position runs them as its "python" backend
+# and test_kernels.py checks the kernels against them; they are far too slow
+# for the search.
+
+
+def evaluate_board(board):
+    """Evaluate the board state"""
+    size = board.shape[0]
+    score = 0
+    for x in range(size):
+        for y in range(size):
+            if board[x, y] == 0:
+                continue
+            for dx, dy in DIRECTIONS:
+                count_2, count_1 = 0, 0
+                open_ends_2, open_ends_1 = 0, 0
+                for step in range(6):
+                    nx, ny = x + step * dx, y + step * dy
+                    if 0 <= nx < size and 0 <= ny < size:
+                        if board[nx, ny] == 2:
+                            count_2 += 1
+                        elif board[nx, ny] == 1:
+                            count_1 += 1
+                        else:
+                            break
+                    else:
+                        break
+                if count_2 > 0:
+                    before_x, before_y = x - dx, y - dy
+                    after_x, after_y = x + count_2 * dx, y + count_2 * dy
+                    if 0 <= before_x < size and 0 <= before_y < size and board[before_x, before_y] == 0:
+                        open_ends_2 += 1
+                    if 0 <= after_x < size and 0 <= after_y < size and board[after_x, after_y] == 0:
+                        open_ends_2 += 1
+                if count_1 > 0:
+                    before_x, before_y = x - dx, y - dy
+                    after_x, after_y = x + count_1 * dx, y + count_1 * dy
+                    if 0 <= before_x < size and 0 <= before_y < size and board[before_x, before_y] == 0:
+                        open_ends_1 += 1
+                    if 0 <= after_x < size and 0 <= after_y < size and board[after_x, after_y] == 0:
+                        open_ends_1 += 1
+                if count_2 >= 5:
+                    score += 100000
+                elif count_2 == 4 and open_ends_2 > 0:
+                    score += 10000
+                elif count_2 == 3 and open_ends_2 > 1:
+                    score += 500
+                elif count_2 == 2 and open_ends_2 > 1:
+                    score += 3000
+
+                if count_1 >= 5:
+                    score -= 70000
+                elif count_1 == 4 and open_ends_1 > 0:
+                    score -= 15000
+                elif count_1 == 3 and open_ends_1 > 1:
+                    score -= 5000
+                elif count_1 == 2 and open_ends_1 > 1:
+                    score -= 500
+    return score
+
+
+def has_open_five(board, player):
+    """Check for open five sequence"""
+    size = board.shape[0]
+    for x in range(size):
+        for y in range(size):
+            if board[x, y] != player:
+                continue
+            for dx, dy in DIRECTIONS:
+                count = 1
+                for step in range(1, 5):
+                    nx, ny = x + step * dx, y + step * dy
+                    if 0 <= nx < size and 0 <= ny < size and board[nx, ny] == player:
+                        count += 1
+                    else:
+                        break
+                if count == 5:
+                    before_x, before_y = x - dx, y - dy
+                    after_x, after_y = x + 5 * dx, y + 5 * dy
+                    if (0 <= before_x < size and 0 <= before_y < size and board[before_x, before_y] == 0) or \
+                       (0 <= after_x < size and 0 <= after_y < size and board[after_x, after_y] == 0):
+                        return True
+    return False
+
+
+def check_win(board, player):
+    """Check for win (6 or more in a row) by scanning the whole board"""
+    size = board.shape[0]
+    for x in range(size):
+        for y in range(size):
+            if board[x, y] != player:
+                continue
+            for dx, dy in DIRECTIONS:
+                count = 1
+                for step in range(1, 6):
+                    nx, ny = x + step * dx, y + step * dy
+                    if 0 <= nx < size and 0 <= ny < size and board[nx, ny] == player:
+                        count += 1
+                    else:
+                        break
+                if count >= 6:
+                    return True
+    return False
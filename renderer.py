@@ -0,0 +1,207 @@
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+import assets
+import instrument
+
+# Retained-mode renderer for the Connect6 board.
+#
+# The empty grid is drawn once to a cached surface. Every frame we compare
+# the board, the highlighted cells and the HUD strings with what is on
+# screen, redraw only the cells and the HUD strip that changed, and push
+# just those rectangles with pygame.display.update(). An idle board costs a
+# NumPy comparison and three string formats per frame.
+#
+# Text surfaces come from a bounded LRU cache keyed by (string, font,
+# colour), so a timer string is rendered once per displayed second and the
+# status and button labels once per game.
+#
+# With Connect6.show_stats the summary of the AI's last search is shown in
+# an opaque panel in the top-left corner (instrument.py).
+
+COLOR_BG = (255, 255, 255)
+COLOR_LINE = (0, 0, 0)
+COLOR_HIGHLIGHT = {1: (150, 255, 150), 2: (255, 200, 150)}  # Green for Player 1, orange for AI
+HUD_HEIGHT = 50
+COLOR_PANEL = (235, 235, 235)
+PANEL_POS = (5, 5)
+TEXT_CACHE_SIZE = 256
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces"""
+
+    def __init__(self, maxsize=TEXT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (text, font, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+class BoardRenderer:
+    def __init__(self, game):
+        self.game = game
+        self.cell_size = game.cell_size
+        self.grid = self._render_grid()
+        self.text = TextCache()
+        self.overlay = pygame.Surface((game.screen_width, game.screen_height), pygame.SRCALPHA)
+        self.overlay.fill((0, 0, 0, 128))  # Semi-transparent black
+        self.invalidate()
+
+    def _render_grid(self):
+        """The empty board and HUD background"""
+        game = self.game
+        surface = pygame.Surface((game.screen_width, game.screen_height))
+        surface.fill(COLOR_BG)
+        for i in range(game.size):
+            for j in range(game.size):
+                pygame.draw.rect(surface, COLOR_LINE,
+                                 (i * self.cell_size, j * self.cell_size, self.cell_size, self.cell_size), 1)
+        return surface
+
+    def invalidate(self):
+        """Force a full redraw on the next frame (new game, new window)"""
+        self.drawn_board = None
+        self.drawn_highlight = set()
+        self.drawn_hud = None
+        self.drawn_game_over = False
+        self.drawn_panel = None
+        self.panel = None  # (lines, surface) of the stats panel
+
+    def hud_texts(self):
+        game = self.game
+        p1_minutes = int(game.player1_time // 60)
+        p1_seconds = int(game.player1_time % 60)
+        p2_minutes = int(game.player2_time // 60)
+        p2_seconds = int(game.player2_time % 60)
+        return (f"X Time: {p1_minutes:02d}:{p1_seconds:02d}",
+                f"O Time: {p2_minutes:02d}:{p2_seconds:02d}",
+                game.status_text)
+
+    def draw(self):
+        """Bring the screen up to date, drawing and pushing only what changed"""
+        game = self.game
+        if game.game_over:
+            # The game over screen is static until the game is reset.
+            if not self.drawn_game_over:
+                self.draw_full()
+            return
+        hud = self.hud_texts()
+        if self.drawn_board is None or self.panel_lines() != self.drawn_panel:
+            self.draw_full()
+            return
+
+        highlight = set(game.last_placed)
+        changed = set(zip(*np.nonzero(game.board != self.drawn_board)))
+        changed |= highlight ^ self.drawn_highlight
+        rects = [self.draw_cell(int(i), int(j), highlight) for i, j in changed]
+        self.drawn_board[:] = game.board
+        self.drawn_highlight = highlight
+        if hud != self.drawn_hud:
+            rects.append(self.draw_hud(hud))
+        if self.drawn_panel and rects:
+            # Cells redrawn under the panel painted over it.
+            panel_rect = self.panel[1].get_rect(topleft=PANEL_POS)
+            if panel_rect.collidelist(rects) != -1:
+                rects.append(self.draw_panel(self.drawn_panel))
+        if rects:
+            pygame.display.update(rects)
+
+    def draw_full(self):
+        """Redraw the whole window"""
+        game = self.game
+        game.screen.blit(self.grid, (0, 0))
+        highlight = set(game.last_placed)
+        for i, j in zip(*np.nonzero(game.board)):
+            self.draw_cell(int(i), int(j), highlight)
+        self.draw_hud(self.hud_texts())
+        self.drawn_board = game.board.copy()
+        self.drawn_highlight = highlight
+        self.drawn_panel = self.panel_lines()
+        if self.drawn_panel:
+            self.draw_panel(self.drawn_panel)
+        if game.game_over:
+            game.draw_game_over()
+        self.drawn_game_over = game.game_over
+        pygame.display.flip()
+
+    def draw_cell(self, i, j, highlight):
+        """Redraw one cell from the cached grid; returns its rect"""
+        game = self.game
+        size = self.cell_size
+        rect = pygame.Rect(i * size, j * size, size, size)
+        game.screen.blit(self.grid, rect, rect)
+        value = game.board[i, j]
+        center = (rect.x + size // 2, rect.y + size // 2)
+        # Highlight cell if it was placed
+        if (i, j) in highlight and value in COLOR_HIGHLIGHT:
+            pygame.draw.rect(game.screen, COLOR_HIGHLIGHT[value], rect)
+            pygame.draw.rect(game.screen, COLOR_LINE, rect, 1)
+        if value == 1:
+            pygame.draw.circle(game.screen, (0, 0, 0), center, size // 2 - 5)
+        elif value == 2:
+            pygame.draw.circle(game.screen, (255, 255, 255), center, size // 2 - 5)
+            pygame.draw.circle(game.screen, (0, 0, 0), center, size // 2 - 5, 1)
+        return rect
+
+    def draw_hud(self, hud):
+        """Redraw the timers and status strip; returns its rect"""
+        game = self.game
+        rect = pygame.Rect(0, game.screen_height - HUD_HEIGHT, game.screen_width, HUD_HEIGHT)
+        game.screen.blit(self.grid, rect, rect)
+        p1_time_text, p2_time_text, status_text = hud
+        p1_time_surface = self.text.render(game.font, p1_time_text, (0, 0, 0))
+        game.screen.blit(p1_time_surface, (10, game.screen_height - 40))
+        p2_time_surface = self.text.render(game.font, p2_time_text, (0, 0, 0))
+        p2_time_rect = p2_time_surface.get_rect(topright=(game.screen_width - 10, game.screen_height - 40))
+        game.screen.blit(p2_time_surface, p2_time_rect)
+        status_surface = self.text.render(game.font, status_text, (0, 0, 0))
+        status_rect = status_surface.get_rect(center=(game.screen_width // 2, game.screen_height - 40))
+        game.screen.blit(status_surface, status_rect)
+        self.drawn_hud = hud
+        return rect
+
+    def panel_lines(self):
+        """Lines of the stats panel, or None when it is hidden"""
+        game = self.game
+        if not game.show_stats:
+            return None
+        if game.search_stats is None:
+            return ("Search stats: waiting for the AI's next search",)
+        return tuple(instrument.overlay_lines(game.search_stats))
+
+    def draw_panel(self, lines):
+        """Draw the stats panel; returns its rect"""
+        if self.panel is None or self.panel[0] != lines:
+            font = assets.font("arial", 16)
+            surfaces = [self.text.render(font, line, (0, 0, 0)) for line in lines]
+            width = max(surface.get_width() for surface in surfaces) + 12
+            height = sum(surface.get_height() for surface in surfaces) + 8
+            panel = pygame.Surface((width, height))
+            panel.fill(COLOR_PANEL)
+            pygame.draw.rect(panel, COLOR_LINE, panel.get_rect(), 1)
+            y = 4
+            for surface in surfaces:
+                panel.blit(surface, (6, y))
+                y += surface.get_height()
+            self.panel = (lines, panel)
+        return self.game.screen.blit(self.panel[1], PANEL_POS)
@@ -0,0 +1,334 @@
+import time
+
+# Headless Connect6: the rules, the game clock and the AI entry point, with
+# no pygame anywhere. game.py is a front end over this module; a server, a
+# benchmark or a self-play worker can use it directly.
+#
+# Rules: player 1 (X) opens with one stone, after that each turn is two
+# stones; the first to get six or more in a row wins.
+#
+# Importing this module only costs a few milliseconds: NumPy and the search
+# modules are imported on first use, when the first Position is built. That
+# first Position is the expensive step, about 120 ms: ~100 ms to import NumPy,
+# the rest for the engine tables (loaded from the on-disk cache of kernels.py;
+# ~25 ms more the first time they are built) and the Zobrist keys. Every
+# Position after that takes well under a millisecond.
+#
+# The whole-board checks of a Position (evaluate, check_win, has_open_five)
+# run on one of BACKENDS, chosen per position:
+#   "bitboard" - the live data of the EngineState: the incremental score and
+#                the bitboards kept by make()/unmake(); nothing is scanned
+#   "numpy"    - the vectorized kernels of kernels.py over the whole board
+#   "python"   - the original board loops (reference.py), for checking
+
+BACKENDS = ("bitboard", "numpy", "python")
+
+
+class Position:
+    """A game in progress: the board, whose turn it is and the move history"""
+
+    def __init__(self, size=19, board=None, weights=None, backend="bitboard"):
+        from engine import EngineState
+
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+        self.size = size
+        self.backend = backend
+        self.state = EngineState(size, board, weights)  # NumPy board plus incremental search data
+        self.turn = 1
+        self.move_count = 0  # Stones placed in the current turn
+        self.moves_per_turn = 1
+        self.winner = None
+        self.history = []  # (x, y, turn, move_count, moves_per_turn) before each stone
+        self.empty = int((self.board == 0).sum())
+
+    @classmethod
+    def from_board(cls, board, turn=1, stones_left=None, weights=None, backend="bitboard"):
+        """Position with the given stones on the board and turn to move.
+
+        stones_left defaults to a full turn: 1 on an empty board, else 2.
+        weights are the evaluation weights for the search (kernels.WEIGHTS).
+        """
+        position = cls(board.shape[0], board.copy(), weights, backend)
+        position.turn = turn
+        position.moves_per_turn = 2 if board.any() else 1
+        if stones_left is not None:
+            position.move_count = position.moves_per_turn - stones_left
+        return position
+
+    @property
+    def board(self):
+        """NumPy board of 0/1/2, indexed board[x, y]"""
+        return self.state.board
+
+    @property
+    def stones_left(self):
+        """Stones the player to move still places this turn"""
+        return self.moves_per_turn - self.move_count
+
+    @property
+    def game_over(self):
+        return self.winner is not None or self.empty == 0
+
+    def get(self, x, y):
+        return self.state.cells[self.state.index(x, y)]
+
+    def is_legal(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size and self.get(x, y) == 0
+
+    def legal_moves(self):
+        """Every empty cell"""
+        cells, index = self.state.cells, self.state.index
+        return [(x, y) for x in range(self.size) for y in range(self.size) if cells[index(x, y)] == 0]
+
+    def candidate_moves(self):
+        """Empty cells near the stones, the moves worth searching"""
+        return self.state.candidate_moves()
+
+    def place(self, x, y):
+        """Place a stone for the player to move. Returns True if it wins."""
+        if self.winner is not None:
+            raise ValueError("the game is over")
+        if not self.is_legal(x, y):
+            raise ValueError(f"illegal move {(x, y)}")
+        self.history.append((x, y, self.turn, self.move_count, self.moves_per_turn))
+        won = self.state.make(x, y, self.turn)
+        self.empty -= 1
+        self.move_count += 1
+        if won:
+            self.winner = self.turn
+        elif self.move_count >= self.moves_per_turn:
+            self.turn = 3 - self.turn
+            self.move_count = 0
+            self.moves_per_turn = 2
+        return won
+
+    def undo(self):
+        """Take back the last stone; returns its (x, y)"""
+        x, y, self.turn, self.move_count, self.moves_per_turn = self.history.pop()
+        self.state.unmake(x, y)
+        self.empty += 1
+        self.winner = None
+        return x, y
+
+    def check_win_at(self, x, y, player=None):
+        """Check for a six on the four lines through (x, y)"""
+        return self.state.check_win_at(x, y, player)
+
+    def _checks(self):
+        """The module answering the whole-board checks for self.backend"""
+        if self.backend == "numpy":
+            import kernels
+
+            return kernels
+        if self.backend == "python":
+            import reference
+
+            return reference
+        return None
+
+    def evaluate(self):
+        """Score of the board from player 2's view.
+
+        The numpy and python backends score with kernels.WEIGHTS only.
+        """
+        checks = self._checks()
+        return self.state.score if checks is None else checks.evaluate_board(self.board)
+
+    def check_win(self, player):
+        """Check for 6 or more in a row anywhere on the board"""
+        checks = self._checks()
+        return self.state.check_win(player) if checks is None else checks.check_win(self.board, player)
+
+    def has_open_five(self, player):
+        """Check for five in a row with an empty cell at either end"""
+        checks = self._checks()
+        return self.state.has_open_five(player) if checks is None else checks.has_open_five(self.board, player)
+
+    def copy(self):
+        other = Position(self.size, self.board.copy(), self.state.weights, self.backend)
+        other.turn, other.move_count, other.moves_per_turn = self.turn, self.move_count, self.moves_per_turn
+        other.winner = self.winner
+        other.empty = self.empty
+        other.history = list(self.history)
+        return other
+
+
+class GameClock:
+    """Per-player countdown clocks, charged to whoever is to move"""
+
+    def __init__(self, time_limit, now=time.monotonic):
+        self.time_limit = time_limit
+        self.now = now  # Seconds, any monotonic source
+        self.reset()
+
+    def reset(self):
+        self.remaining = {1: self.time_limit, 2: self.time_limit}
+        self.last_update = self.now()
+
+    def update(self, player):
+        """Charge the time since the last update to player.
+
+        Returns True if player's clock has run out.
+        """
+        current = self.now()
+        self.remaining[player] -= current - self.last_update
+        self.last_update = current
+        if self.remaining[player] <= 0:
+            self.remaining[player] = 0
+            return True
+        return False
+
+    def seconds_to_next_tick(self, player):
+        """Time until player's clock shows the next whole second"""
+        return self.remaining[player] % 1 or 1.0
+
+
+def tactical_move(position):
+    """A stone the player to move must play, without searching.
+
+    Returns (move, reason) with reason "win" (makes a six), "block_six"
+    (stops an opponent six) or "block_five" (stops an opponent open five),
+    or None if there is no such stone.
+    """
+    state = position.state
+    player = position.turn
+    opponent = 3 - player
+    moves = position.candidate_moves()
+    for reason, stone in (("win", player), ("block_six", opponent)):
+        for i, j in moves:
+            won = state.make(i, j, stone)
+            state.unmake(i, j)
+            if won:
+                return (i, j), reason
+    for i, j in moves:
+        state.make(i, j, opponent)
+        open_five = position.has_open_five(opponent)
+        state.unmake(i, j)
+        if open_five:
+            return (i, j), "block_five"
+    return None
+
+
+def search(position, remaining=None, time_limit=None, mode="turn", max_depth=None, turns=None, tt=None,
+           tactics=True, stats=False, threats=True, engine="minimax", playouts=None):
+    """Choose the rest of the current turn for the player to move.
+
+    Returns a dict with "turn" (a tuple of moves), "depth", "nodes" and
+    "iterations", as ai_worker.search_position. remaining/time_limit are the
+    player's clock in seconds; without a time_limit the search runs to
+    max_depth and is deterministic. With tactics, a forced stone from
+    tactical_move() is returned without searching. The position itself is
+    left unchanged.
+
+    With threats, the threat-space solver (threats.py) runs first on its
+    own budget: a forced win is returned without searching, and if the
+    opponent has one the root is cut down to the turns that stop it.
+
+    With stats, or when instrument.py has hooks, the result also has a
+    "stats" summary, which is passed to the hooks in this process.
+
+    engine "mcts" searches with Monte Carlo tree search (mcts.py) instead of
+    minimax, within the time budget and/or playouts rollouts; the result then
+    has "playouts" and "playouts_per_s", and its "stats" summary is
+    instrument.mcts_summary.
+    """
+    import instrument
+    from search import Searcher
+    from timeman import TimeManager
+
+    if tactics:
+        forced = tactical_move(position)
+        if forced is not None:
+            return {"turn": (forced[0],), "depth": 0, "nodes": 0, "iterations": [], "reason": forced[1]}
+    player = position.turn
+    stones = position.stones_left
+    searches = 1 if mode == "turn" else stones
+    time_manager = TimeManager(remaining, time_limit, stones=searches) if time_limit else None
+    searcher = Searcher(position.state, tt, mode=mode)
+    if max_depth is not None:
+        searcher.max_depth = max_depth
+
+    threat_nodes = 0
+    if threats:
+        win, turns, threat_nodes = _threat_check(position, searcher, turns, time_manager)
+        if win is not None:
+            return win
+
+    if engine == "mcts":
+        from mcts import MCTS
+
+        tree = MCTS(position.state, time_manager.budget if time_manager else None, playouts)
+        turn = tree.search(player, stones, turns)
+        result = {"turn": turn, "depth": 0, "nodes": tree.tree_nodes, "threat_nodes": threat_nodes,
+                  "iterations": [], "playouts": tree.playouts, "playouts_per_s": tree.playouts_per_s()}
+        if stats or instrument.enabled():
+            result["stats"] = instrument.mcts_summary(tree, player)
+            instrument.emit(result["stats"])
+        return result
+
+    search_stats = None
+    if stats or instrument.enabled():
+        search_stats = instrument.SearchStats()
+        search_stats.attach(searcher)
+    try:
+        turn = searcher.search(player, time_manager, stones=stones, turns=turns)
+    finally:
+        if search_stats is not None:
+            search_stats.detach(searcher)
+    result = {"turn": turn, "depth": searcher.depth_reached, "nodes": searcher.nodes,
+              "threat_nodes": threat_nodes, "iterations": searcher.iterations}
+    if search_stats is not None:
+        result["stats"] = search_stats.summary(searcher, player)
+        instrument.emit(result["stats"])
+    return result
+
+
+def _threat_check(position, searcher, turns, time_manager):
+    """Run the threat-space solver ahead of a search.
+
+    Returns (win, turns, solver nodes): win is the search result for a
+    forced win of the player to move, else None, and turns are the root
+    turns left to search (None for all of them).
+    """
+    from search import WIN_SCORE
+    from threats import NODE_BUDGET, TIME_SHARE, ThreatSolver
+
+    player = position.turn
+    stones = position.stones_left
+    solver = ThreatSolver(position.state, NODE_BUDGET, time_manager.budget * TIME_SHARE if time_manager else None)
+    win = solver.find_win(player, stones)
+    if win is not None:
+        score = WIN_SCORE if player == 2 else -WIN_SCORE
+        return ({"turn": win, "depth": 0, "nodes": 0, "threat_nodes": solver.nodes,
+                 "iterations": [(0, win, score, time.perf_counter() - solver.start_time)], "reason": "threat_win"}, turns, solver.nodes)
+    if solver.find_win(3 - player) is not None:
+        # The opponent has a forced win: only search the turns that stop it.
+        root = list(turns) if turns is not None else searcher.root_turns(player, stones)
+        safe = solver.safe_turns(player, root)
+        if safe:
+            turns = safe
+    return None, turns, solver.nodes
+
+
+def plan_root(position, remaining=None, time_limit=None, mode="turn", threats=True):
+    """The root of a search split between workers (parallel.py).
+
+    Returns a dict with "turns", the root turns best first, cut down to the
+    safe ones if the opponent has a forced win; "win", the search result
+    when the threat solver finds a forced win (then there is nothing to
+    split); and "threat_nodes" and "elapsed" (seconds). The shares are then
+    searched with threats=False, so the solver runs once per move.
+    """
+    from search import Searcher
+    from timeman import TimeManager
+
+    start = time.perf_counter()
+    searches = 1 if mode == "turn" else position.stones_left
+    time_manager = TimeManager(remaining, time_limit, stones=searches) if time_limit else None
+    searcher = Searcher(position.state, mode=mode)
+    turns = searcher.root_turns(position.turn, position.stones_left)
+    win, threat_nodes = None, 0
+    if threats:
+        win, turns, threat_nodes = _threat_check(position, searcher, turns, time_manager)
+    return {"turns": turns, "win": win, "threat_nodes": threat_nodes, "elapsed": time.perf_counter() - start}
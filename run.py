@@ -1,35 +1,44 @@
+import time
+
+START = time.perf_counter()  # Startup time is measured from here to the first menu frame
+
 import pygame
+import ai_worker
+import assets
+import records
 from menu import MainMenu
 from game import Connect6
 
 def main():
-    pygame.init()
+    assets.init()
     screen = pygame.display.set_mode((800, 600))
     pygame.display.set_caption("Connect6")
-    clock = pygame.time.Clock()
 
     menu = MainMenu()
     running = True
 
+    menu.draw(screen)
+    print(f"First frame after {(time.perf_counter() - START) * 1000:.0f} ms")
     while running:
         if menu.needs_redraw:
             menu.draw(screen)
 
-        for event in pygame.event.get():
+        # Block until there is input; the menu has nothing to animate.
+        for event in [pygame.event.wait()] + pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             action = menu.handle_event(event, screen)
             if action == "play_ai":
                 print(f"Starting AI game with sound_enabled={menu.sound_enabled}, music_busy={pygame.mixer.music.get_busy()}")
-                game = Connect6(size=19, ai_enabled=True, sound_enabled=menu.sound_enabled)
+                game = Connect6(size=19, ai_enabled=True, sound_enabled=menu.sound_enabled,
+                                record=records.RECORD_PATH)
                 result = game.run()
                 if result == "menu":
                     menu.needs_redraw = True
                     pygame.display.set_mode((800, 600))
                     if menu.sound_enabled:
                         try:
-                            pygame.mixer.music.load("intro.mp3")
-                            pygame.mixer.music.set_volume(0.5)
+                            assets.load_music("intro.mp3")
                             pygame.mixer.music.play(-1)
                             print("Music restarted in menu")
                         except Exception as e:
@@ -38,15 +47,15 @@ def main():
                     running = False
             elif action == "play_human":
                 print(f"Starting Human game with sound_enabled={menu.sound_enabled}, music_busy={pygame.mixer.music.get_busy()}")
-                game = Connect6(size=19, ai_enabled=False, sound_enabled=menu.sound_enabled)
+                game = Connect6(size=19, ai_enabled=False, sound_enabled=menu.sound_enabled,
+                                record=records.RECORD_PATH)
                 result = game.run()
                 if result == "menu":
                     menu.needs_redraw = True
                     pygame.display.set_mode((800, 600))
                     if menu.sound_enabled:
                         try:
-                            pygame.mixer.music.load("intro.mp3")
-                            pygame.mixer.music.set_volume(0.5)
+                            assets.load_music("intro.mp3")
                             pygame.mixer.music.play(-1)
                             print("Music restarted in menu")
                         except Exception as e:
@@ -56,8 +65,7 @@ def main():
             elif action == "quit":
                 running = False
 
-        clock.tick(60)
-
+    ai_worker.shutdown_pool()
     pygame.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,270 @@
+import time
+
+from ordering import MoveOrderer
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+# Minimax search over an EngineState.
+#
+# Scores are from player 2's point of view: player 2 maximizes, player 1
+# minimizes. search() runs iterative deepening under a TimeManager and
+# returns the best turn of the deepest iteration that finished.
+#
+# There are two search modes:
+#   "turn"  - a ply is a whole Connect6 turn, an unordered pair of stones,
+#             so depth counts real turns. Pairs are built from the best
+#             single stones to keep the branching factor down.
+#   "stone" - a ply is one stone and players alternate every stone (the
+#             original search); the caller searches again for a second stone.
+#
+# Candidates come from a MoveOrderer (ordering.py) and only the first
+# root_moves/node_moves stones and root_pairs/node_pairs pairs are searched.
+
+# Above any evaluate_board() score, so a six always beats an open five. A six
+# found ply plies below the root scores WIN_SCORE - ply, so the search
+# prefers the fastest win and the slowest loss; anything beyond WIN_BOUND is
+# a forced result. The transposition table stores these scores relative to
+# the node (to_tt/from_tt), as the same position can sit at any ply.
+WIN_SCORE = 10 ** 9
+MAX_PLY = 64
+WIN_BOUND = WIN_SCORE - MAX_PLY
+CHECK_INTERVAL = 16  # nodes between clock checks
+
+
+def win_score(player, ply):
+    """Score of a six by player at ply plies below the root"""
+    return WIN_SCORE - ply if player == 2 else ply - WIN_SCORE
+
+
+def to_tt(score, ply):
+    """A score as stored in the transposition table for a node at ply"""
+    if score >= WIN_BOUND:
+        return score + ply
+    if score <= -WIN_BOUND:
+        return score - ply
+    return score
+
+
+def from_tt(score, ply):
+    """A stored score back as seen from a node at ply"""
+    if score >= WIN_BOUND:
+        return score - ply
+    if score <= -WIN_BOUND:
+        return score + ply
+    return score
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when the time budget runs out"""
+
+
+class Searcher:
+    def __init__(self, state, tt=None, mode="turn", max_depth=8, root_moves=10, node_moves=10,
+                 root_pairs=30, node_pairs=15):
+        self.state = state
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.mode = mode
+        self.max_depth = max_depth
+        self.root_moves = root_moves  # single stones considered at the root
+        self.node_moves = node_moves  # single stones considered below the root
+        self.root_pairs = root_pairs  # turn mode: stone pairs searched at the root
+        self.node_pairs = node_pairs  # turn mode: stone pairs searched below the root
+        self.orderer = MoveOrderer(state.size)
+        self.nodes = 0
+        self.depth_reached = 0
+        self.iteration_depth = 0
+        self.iterations = []  # (depth, best_turn, score, elapsed seconds) of every finished iteration
+        self.time_manager = None
+
+    def root_turns(self, player, stones=2):
+        """The turns search() considers at the root, best first"""
+        if self.mode == "turn":
+            return self.orderer.order_turns(self.state, player, stones, 0,
+                                            moves_limit=self.root_moves, pairs_limit=self.root_pairs)
+        return [(move,) for move in self.orderer.order_moves(self.state, player, 0, limit=self.root_moves)]
+
+    def search(self, player, time_manager=None, stones=2, turns=None):
+        """Return the best turn for player as a tuple of moves.
+
+        In turn mode the tuple holds ``stones`` moves (fewer if the first one
+        already wins); in stone mode it holds a single move. ``turns``
+        restricts the root to the given turns (see parallel.py).
+        """
+        self.time_manager = time_manager
+        self.tt.new_search()
+        self.orderer.new_search()
+        self.nodes = 0
+        self.depth_reached = 0
+        self.iterations = []
+        start = time.perf_counter()
+        turns = list(turns) if turns is not None else self.root_turns(player, stones)
+        best_turn = turns[0]
+        for depth in range(1, self.max_depth + 1):
+            if depth > 1 and time_manager is not None and not time_manager.can_start_iteration():
+                break
+            self.iteration_depth = depth
+            try:
+                best_turn, score = self.search_root(player, turns, depth)
+            except SearchAborted:
+                break
+            self.depth_reached = depth
+            self.iterations.append((depth, best_turn, score, time.perf_counter() - start))
+            if abs(score) >= WIN_BOUND:
+                break
+            # Search the best turn first in the next iteration.
+            turns.remove(best_turn)
+            turns.insert(0, best_turn)
+        return best_turn
+
+    def search_root(self, player, turns, depth):
+        """Search every root turn to depth plies, returns (best_turn, score)"""
+        maximizing = player == 2
+        best_turn, best_score = None, None
+        for turn in turns:
+            score = self.search_turn(turn, player, depth - 1, float('-inf'), float('inf'))
+            if best_score is None or (score > best_score if maximizing else score < best_score):
+                best_turn, best_score = turn, score
+        return best_turn, best_score
+
+    def search_turn(self, turn, player, depth, alpha, beta):
+        """Play the stones of one turn, search the reply and take them back"""
+        made = []
+        try:
+            for i, j in turn:
+                made.append((i, j))
+                if self.state.make(i, j, player):
+                    return win_score(player, self.iteration_depth - depth - 1)
+            if self.mode == "turn":
+                return self.minimax_turn(depth, player == 1, alpha, beta)
+            return self.minimax(depth, player == 1, alpha, beta)
+        finally:
+            for i, j in reversed(made):
+                self.state.unmake(i, j)
+
+    def minimax_turn(self, depth, is_maximizing, alpha, beta):
+        """Alpha-beta over whole turns of two stones (turn mode)"""
+        self.nodes += 1
+        if self.time_manager is not None and self.nodes % CHECK_INTERVAL == 0 and self.time_manager.expired():
+            raise SearchAborted()
+        if depth == 0:
+            return self.state.score
+
+        ply = self.iteration_depth - depth
+        key = self.state.hash ^ (self.state.side_key if is_maximizing else 0)
+        entry = self.tt.probe(key)
+        tt_move = entry[3] if entry is not None else None
+        if entry is not None and entry[0] >= depth:
+            _, flag, score, _ = entry
+            score = from_tt(score, ply)
+            if flag == EXACT:
+                return score
+            if flag == LOWER:
+                alpha = max(alpha, score)
+            elif flag == UPPER:
+                beta = min(beta, score)
+            if beta <= alpha:
+                return score
+        alpha_orig, beta_orig = alpha, beta
+        best_turn = None
+
+        player = 2 if is_maximizing else 1
+        turns = self.orderer.order_turns(self.state, player, 2, ply, tt_move,
+                                         moves_limit=self.node_moves, pairs_limit=self.node_pairs)
+        best_eval = float('-inf') if is_maximizing else float('inf')
+        for turn in turns:
+            eval = self.search_turn(turn, player, depth - 1, alpha, beta)
+            if is_maximizing:
+                if eval > best_eval:
+                    best_eval, best_turn = eval, turn
+                alpha = max(alpha, eval)
+            else:
+                if eval < best_eval:
+                    best_eval, best_turn = eval, turn
+                beta = min(beta, eval)
+            if beta <= alpha:
+                self.orderer.record_cutoff(turn, player, ply, depth)
+                break
+
+        if best_eval <= alpha_orig:
+            flag = UPPER
+        elif best_eval >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, flag, to_tt(best_eval, ply), best_turn)
+        return best_eval
+
+    def minimax(self, depth, is_maximizing, alpha, beta, last_move=None):
+        """Minimax algorithm with alpha-beta pruning.
+
+        Only the stone placed last can have completed a six, so the win check
+        is done on the lines through ``last_move``. Results are cached in
+        self.tt by Zobrist hash.
+        """
+        self.nodes += 1
+        if self.time_manager is not None and self.nodes % CHECK_INTERVAL == 0 and self.time_manager.expired():
+            raise SearchAborted()
+        if last_move is not None:
+            i, j = last_move
+            if self.state.check_win_at(i, j):
+                return win_score(self.state.board[i, j], self.iteration_depth - depth - 1)
+        if depth == 0:
+            return self.state.score
+
+        ply = self.iteration_depth - depth
+        key = self.state.hash ^ (self.state.side_key if is_maximizing else 0)
+        entry = self.tt.probe(key)
+        tt_move = entry[3] if entry is not None else None
+        if entry is not None and entry[0] >= depth:
+            _, flag, score, _ = entry
+            score = from_tt(score, ply)
+            if flag == EXACT:
+                return score
+            if flag == LOWER:
+                alpha = max(alpha, score)
+            elif flag == UPPER:
+                beta = min(beta, score)
+            if beta <= alpha:
+                return score
+        alpha_orig, beta_orig = alpha, beta
+        best_move = None
+
+        player = 2 if is_maximizing else 1
+        candidate_moves = self.orderer.order_moves(self.state, player, ply, tt_move, limit=self.node_moves)
+
+        if is_maximizing:
+            best_eval = float('-inf')
+            for i, j in candidate_moves:
+                self.state.make(i, j, 2)
+                try:
+                    eval = self.minimax(depth - 1, False, alpha, beta, last_move=(i, j))
+                finally:
+                    self.state.unmake(i, j)
+                if eval > best_eval:
+                    best_eval, best_move = eval, (i, j)
+                alpha = max(alpha, eval)
+                if beta <= alpha:
+                    self.orderer.record_cutoff((i, j), player, ply, depth)
+                    break
+        else:
+            best_eval = float('inf')
+            for i, j in candidate_moves:
+                self.state.make(i, j, 1)
+                try:
+                    eval = self.minimax(depth - 1, True, alpha, beta, last_move=(i, j))
+                finally:
+                    self.state.unmake(i, j)
+                if eval < best_eval:
+                    best_eval, best_move = eval, (i, j)
+                beta = min(beta, eval)
+                if beta <= alpha:
+                    self.orderer.record_cutoff((i, j), player, ply, depth)
+                    break
+
+        if best_eval <= alpha_orig:
+            flag = UPPER
+        elif best_eval >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, flag, to_tt(best_eval, ply), best_move)
+        return best_eval
@@ -0,0 +1,322 @@
+import argparse
+import asyncio
+import itertools
+import os
+import signal
+import sys
+
+import ai_worker
+import rules
+
+# Connect6 game server.
+#
+# One asyncio process hosts any number of games over a plain line protocol
+# on TCP. Every command is one line and gets exactly one reply line;
+# coordinates are 0-based "x y". Player 1 (X) moves first.
+#
+#   NEW [ai|human] [time limit]   start a game: against the AI (you are X),
+#                                 or a human game another client joins
+#                                 -> GAME <id> <player> <time limit>
+#   JOIN <id>                     join a human game as player 2 (O)
+#                                 -> GAME <id> 2 <time limit>
+#   MOVE <x> <y>                  place a stone
+#                                 -> OK [AI <x> <y> [<x> <y>]] [END <winner> <reason>]
+#                                 After your last stone of a turn against the
+#                                 AI the reply carries the AI's whole turn.
+#   ANALYZE                       best turn for the player to move, not played
+#                                 -> BEST <x> <y> [<x> <y>] depth <d> nodes <n>
+#   CLOCK                         -> CLOCK <player 1 seconds> <player 2 seconds>
+#   BOARD                         -> BOARD <turn> <stones left> <x,y> ...
+#   QUIT                          -> BYE
+# Errors are "ERR <message>". Lines the server sends on its own: in a human
+# game "MOVED <x> <y>" for the opponent's stones, and "END <winner> timeout"
+# when a clock runs out.
+#
+# Clocks are rules.GameClock: time is charged to the player to move
+# whenever a command touches the game, and a timer per game fires when the
+# player to move runs out. AI turns, the tactical checks included, are
+# searched on the ai_worker process pool, so the event loop only does socket
+# I/O, clock bookkeeping and placing stones. At most `queue` searches are
+# submitted at once; a session whose search does not fit waits for a slot
+# and reads no more input meanwhile, so a busy server slows its clients down
+# through TCP instead of queueing without bound.
+#
+#   python server.py --port 6600 --workers 8
+
+DEFAULT_PORT = 6600
+DEFAULT_TIME_LIMIT = 300
+MAX_LINE = 256
+
+
+class ProtocolError(Exception):
+    """A command the server answers with ERR"""
+
+
+class Game:
+    _ids = itertools.count(1)
+
+    def __init__(self, server, ai, time_limit):
+        self.server = server
+        self.id = next(self._ids)
+        self.ai = ai
+        self.position = rules.Position(19)
+        self.clock = rules.GameClock(time_limit)
+        self.sessions = {}  # player -> Session
+        self.result = None  # (winner, reason) once over
+        self.timer = None
+
+    @property
+    def over(self):
+        return self.result is not None
+
+    def arm_clock(self):
+        """Fire check_clock when the player to move runs out of time"""
+        if self.timer is not None:
+            self.timer.cancel()
+        if not self.over:
+            remaining = self.clock.remaining[self.position.turn]
+            self.timer = asyncio.get_running_loop().call_later(remaining + 0.01, self.check_clock)
+
+    def check_clock(self):
+        """Charge the player to move; ends the game if their flag fell"""
+        if self.over:
+            return True
+        if self.clock.update(self.position.turn):
+            self.finish(3 - self.position.turn, "timeout", notify=True)
+            return True
+        self.arm_clock()
+        return False
+
+    def finish(self, winner, reason, notify=False):
+        self.result = (winner, reason)
+        if self.timer is not None:
+            self.timer.cancel()
+        self.server.games.pop(self.id, None)
+        if notify:
+            for session in self.sessions.values():
+                session.send(f"END {winner} {reason}")
+
+    def place(self, x, y):
+        """Place a stone for the player to move; returns the END words, if any"""
+        player = self.position.turn
+        try:
+            won = self.position.place(x, y)
+        except ValueError as e:
+            raise ProtocolError(str(e))
+        if won:
+            self.finish(player, "six")
+        elif self.position.game_over:
+            self.finish(0, "draw")
+        return [] if not self.over else ["END", str(self.result[0]), self.result[1]]
+
+
+class Session:
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.game = None
+        self.player = None
+
+    def send(self, line):
+        if not self.writer.is_closing():
+            self.writer.write(line.encode() + b"\n")
+
+    async def run(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                words = line.decode(errors="replace").split()
+                if not words:
+                    continue
+                command = words[0].upper()
+                if command == "QUIT":
+                    self.send("BYE")
+                    break
+                handler = getattr(self, "cmd_" + command.lower(), None)
+                try:
+                    if handler is None:
+                        raise ProtocolError(f"unknown command {command}")
+                    reply = await handler(*words[1:])
+                except TypeError:
+                    reply = f"ERR wrong arguments for {command}"
+                except (ProtocolError, ValueError) as e:
+                    reply = f"ERR {e}"
+                self.send(reply)
+                await self.writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.leave()
+            self.writer.close()
+
+    def leave(self):
+        """Drop out of the current game; an unfinished AI game is abandoned"""
+        game = self.game
+        if game is None:
+            return
+        game.sessions.pop(self.player, None)
+        if not game.over and (game.ai or not game.sessions):
+            game.finish(0, "abandoned")
+        elif not game.over:
+            game.finish(3 - self.player, "resigned", notify=True)
+        self.game = None
+
+    def current_game(self):
+        if self.game is None:
+            raise ProtocolError("no game, send NEW or JOIN first")
+        return self.game
+
+    async def cmd_new(self, opponent="ai", time_limit=DEFAULT_TIME_LIMIT):
+        if opponent not in ("ai", "human"):
+            raise ProtocolError("opponent must be ai or human")
+        time_limit = int(time_limit)
+        if not 0 < time_limit <= 86400:
+            raise ProtocolError("time limit must be 1 to 86400 seconds")
+        self.leave()
+        game = Game(self.server, opponent == "ai", time_limit)
+        self.server.games[game.id] = game
+        self.game, self.player = game, 1
+        game.sessions[1] = self
+        if game.ai:
+            game.arm_clock()  # A human game starts its clock when player 2 joins
+        return f"GAME {game.id} 1 {time_limit}"
+
+    async def cmd_join(self, game_id):
+        game = self.server.games.get(int(game_id))
+        if game is None or game.ai or 2 in game.sessions:
+            raise ProtocolError(f"no open game {game_id}")
+        self.leave()
+        self.game, self.player = game, 2
+        game.sessions[2] = self
+        game.clock.reset()
+        game.arm_clock()
+        return f"GAME {game.id} 2 {game.clock.time_limit}"
+
+    async def cmd_move(self, x, y):
+        game = self.current_game()
+        if not game.ai and len(game.sessions) < 2:
+            raise ProtocolError("waiting for an opponent")
+        if game.check_clock():
+            raise ProtocolError("the game is over")
+        if game.position.turn != self.player:
+            raise ProtocolError("not your turn")
+        x, y = int(x), int(y)
+        words = ["OK"] + game.place(x, y)
+        opponent = game.sessions.get(3 - self.player)
+        if opponent is not None:
+            opponent.send(f"MOVED {x} {y}" + ("" if not game.over else f" END {' '.join(words[2:])}"))
+        if game.ai and not game.over and game.position.turn == 2:
+            words += await self.ai_turn(game)
+        game.arm_clock()
+        return " ".join(words)
+
+    async def ai_turn(self, game):
+        """Play the AI's turn; returns the reply words"""
+        position = game.position
+        words = ["AI"]
+        while not game.over and position.turn == 2:
+            # A forced stone comes back on its own; the next pass searches
+            # for the rest of the turn.
+            result = await self.server.search(position, game.clock, tactics=True)
+            if game.check_clock():
+                break  # Flag fell while thinking, already announced
+            for x, y in result["turn"]:
+                words += [str(x), str(y)]
+                words += game.place(x, y)
+                if game.over:
+                    break
+        return words if len(words) > 1 or game.over else []
+
+    async def cmd_analyze(self):
+        game = self.current_game()
+        if game.over:
+            raise ProtocolError("the game is over")
+        result = await self.server.search(game.position, game.clock)
+        stones = " ".join(f"{x} {y}" for x, y in result["turn"])
+        return f"BEST {stones} depth {result['depth']} nodes {result['nodes']}"
+
+    async def cmd_clock(self):
+        game = self.current_game()
+        game.check_clock()
+        return f"CLOCK {game.clock.remaining[1]:.1f} {game.clock.remaining[2]:.1f}"
+
+    async def cmd_board(self):
+        game = self.current_game()
+        position = game.position
+        stones = " ".join(f"{x},{y}" for x, y, *_ in position.history)
+        return f"BOARD {position.turn} {position.stones_left} {stones}".rstrip()
+
+
+class GameServer:
+    def __init__(self, workers, queue, max_depth=None, engine="minimax"):
+        self.workers = workers
+        self.slots = asyncio.Semaphore(queue)  # Searches submitted to the pool at once
+        self.max_depth = max_depth  # Fixed-depth searches instead of the clock, for testing
+        self.engine = engine
+        self.games = {}  # id -> Game, unfinished only
+        self.sessions = 0
+        self.searches = 0
+
+    async def search(self, position, clock, tactics=False):
+        """Search the position on the worker pool, waiting for a free slot.
+
+        With tactics the worker first looks for a forced stone, see
+        rules.tactical_move; the event loop never runs the engine's checks.
+        """
+        player = position.turn
+        clock.update(player)
+        time_limit = None if self.max_depth else clock.time_limit
+        async with self.slots:
+            future = ai_worker.get_pool(self.workers).submit(
+                ai_worker.search_position, ai_worker.encode_position(position), player, position.stones_left,
+                clock.remaining[player], time_limit, "turn", None, self.max_depth, False, self.engine, tactics)
+            result = await asyncio.wrap_future(future)
+        self.searches += 1
+        return result
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+        try:
+            await Session(self, reader, writer).run()
+        finally:
+            self.sessions -= 1
+
+    async def serve(self, host, port):
+        ai_worker.get_pool(self.workers)
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE, backlog=1024)
+        print(f"Connect6 server on {host}:{port} with {self.workers} AI workers")
+        async with server:
+            await server.serve_forever()
+
+
+def interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Connect6 line-protocol game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="AI search processes")
+    parser.add_argument("--queue", type=int, help="searches submitted at once, default 2 per worker")
+    parser.add_argument("--depth", type=int, help="search to this depth instead of using the clock")
+    parser.add_argument("--engine", choices=("minimax", "mcts"), default="minimax")
+    args = parser.parse_args(argv)
+
+    server = GameServer(args.workers, args.queue or 2 * args.workers, args.depth, args.engine)
+    signal.signal(signal.SIGTERM, interrupt)  # Stop the AI workers on kill too
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ai_worker.shutdown_pool()
+        print(f"Server stopped after {server.searches} searches")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import numpy as np
+import pygame
+
+import assets
+
+# Sound effects, synthesized once per process.
+#
+# Each effect is a short sequence of sine tones. The first call to bank()
+# renders all of them into pygame.mixer.Sound objects in the mixer's own
+# format; every Connect6 after that shares the same objects, so creating a
+# game or placing a stone does no audio work. Sound.play() mixes on SDL's
+# audio thread and returns at once. play() is silent while enabled is False;
+# Connect6 sets it from its sound_enabled option.
+
+# Effect name -> [(frequency in Hz, duration in seconds), ...]
+EFFECTS = {
+    "place": [(660, 0.05)],
+    "ai_move": [(520, 0.05)],
+    "win": [(523, 0.08), (659, 0.08), (784, 0.16)],
+    "timeout": [(330, 0.12), (220, 0.2)],
+}
+VOLUME = 0.8
+FADE = 0.005  # Seconds of fade in/out per tone, avoids clicks
+
+_bank = None
+enabled = True
+
+
+def synthesize(tones, sample_rate, channels):
+    """Render a tone sequence to interleaved int16 samples"""
+    parts = []
+    for freq, duration in tones:
+        t = np.arange(int(sample_rate * duration)) / sample_rate
+        wave = np.sin(2 * np.pi * freq * t)
+        ramp = min(int(sample_rate * FADE), len(wave) // 2)
+        if ramp:
+            envelope = np.linspace(0, 1, ramp)
+            wave[:ramp] *= envelope
+            wave[-ramp:] *= envelope[::-1]
+        parts.append(wave)
+    wave = (np.concatenate(parts) * VOLUME * 32767).astype(np.int16)
+    return np.repeat(wave, channels)
+
+
+def bank():
+    """Name -> pygame.mixer.Sound for every effect; empty if there is no audio"""
+    global _bank
+    if _bank is None:
+        _bank = {}
+        try:
+            assets.init()
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            sample_rate, _, channels = pygame.mixer.get_init()
+            for name, tones in EFFECTS.items():
+                _bank[name] = pygame.mixer.Sound(buffer=synthesize(tones, sample_rate, channels).tobytes())
+        except Exception as e:
+            print(f"Error creating sounds: {e}")
+    return _bank
+
+
+def play(name):
+    """Play an effect if sound is enabled and audio is available"""
+    if not enabled:
+        return
+    sound = bank().get(name)
+    if sound is not None:
+        sound.play()
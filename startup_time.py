@@ -0,0 +1,59 @@
+import os
+import statistics
+import subprocess
+import sys
+
+# Measures cold start: each sample runs in a fresh interpreter, so nothing
+# is cached between runs except by the OS. Runs headless (SDL dummy video
+# and audio drivers), so it works on a build machine as well as a desktop.
+#
+#   python startup_time.py [runs]
+
+STEPS = {
+    "import game": """
+import game
+""",
+    "first menu frame": """
+import pygame, assets
+from menu import MainMenu
+assets.init()
+screen = pygame.display.set_mode((800, 600))
+MainMenu().draw(screen)
+""",
+    "first game frame": """
+import ai_worker
+from game import Connect6
+Connect6(ai_enabled=True).setup()
+ai_worker.shutdown_pool()
+""",
+}
+
+TIMED = """
+import time
+start = time.perf_counter()
+{code}
+print("STARTUP_MS", (time.perf_counter() - start) * 1000)
+"""
+
+
+def measure(code, runs):
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", TIMED.format(code=code)], cwd=here, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        line = [line for line in out.splitlines() if line.startswith("STARTUP_MS")][-1]
+        samples.append(float(line.split()[1]))
+    return samples
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, code in STEPS.items():
+        samples = measure(code, runs)
+        print(f"{name:18s} median {statistics.median(samples):7.1f} ms   min {min(samples):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+
+import ai_worker
+import kernels
+from bitboard import BitboardState
+from engine import EngineState
+
+# The bitboards EngineState keeps against the kernels, and the packing the
+# AI workers use.
+
+SIZE = 19
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_live_bitboards_match_kernels(seed):
+    rng = random.Random(seed)
+    state = EngineState(SIZE)
+    placed = []
+    for step in range(200):
+        if placed and rng.random() < 0.3:
+            state.unmake(*placed.pop(rng.randrange(len(placed))))
+        else:
+            x, y = rng.choice(state.candidate_moves())
+            state.make(x, y, rng.choice((1, 2)))
+            placed.append((x, y))
+        for player in (1, 2):
+            assert state.check_win(player) == kernels.check_win(state.board, player)
+            assert state.has_open_five(player) == kernels.has_open_five(state.board, player)
+        if step % 20 == 0:
+            assert state.bitboard.bits == BitboardState.from_array(state.board).bits
+
+
+def test_no_wrap_across_the_edge():
+    board = np.zeros((SIZE, SIZE), dtype=int)
+    board[0, 16:19] = 1
+    board[1, 0:3] = 1  # Six bits in a row without the guard column
+    state = BitboardState.from_array(board)
+    assert not state.check_win(1) and not kernels.check_win(board, 1)
+    board[1, 3:5] = 2
+    board[0, 13:16] = 1
+    assert BitboardState.from_array(board).check_win(1)
+
+
+def test_pack_round_trip():
+    rng = np.random.default_rng(3)
+    board = rng.integers(0, 3, size=(SIZE, SIZE))
+    assert (BitboardState.from_array(board).to_array() == board).all()
+    assert (ai_worker.decode_board(ai_worker.encode_board(board)) == board).all()
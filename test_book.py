@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from book import INVERSE, SYMMETRIES, BookBuilder, OpeningBook, canonical, open_book, transform_turn
+
+# Canonical keys under the 8 symmetries and the book file round trip.
+
+SIZE = 19
+N = SIZE - 1
+STONES = {(9, 9): 1, (10, 9): 2, (10, 11): 2, (7, 12): 1, (8, 12): 1}
+REPLY = ((11, 10), (12, 11))
+
+
+def board_of(stones, symmetry=0):
+    board = np.zeros((SIZE, SIZE), dtype=int)
+    for (x, y), player in stones.items():
+        board[SYMMETRIES[symmetry](x, y, N)] = player
+    return board
+
+
+def test_inverse_undoes_every_symmetry():
+    for s, transform in enumerate(SYMMETRIES):
+        undo = SYMMETRIES[INVERSE[s]]
+        assert all(undo(*transform(x, y, N), N) == (x, y) for x, y in ((0, 0), (3, 7), (18, 2)))
+
+
+@pytest.mark.parametrize("player", (1, 2))
+def test_canonical_key_is_the_same_for_every_symmetry(player):
+    keys = {canonical(board_of(STONES, s), player)[0] for s in range(len(SYMMETRIES))}
+    assert len(keys) == 1
+    assert canonical(board_of(STONES), 3 - player)[0] not in keys  # Side to move is part of the key
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "test.book")
+    builder = BookBuilder(SIZE)
+    builder.add(board_of(STONES), 1, REPLY, weight=3)
+    builder.add(board_of(STONES, 5), 1, transform_turn(((0, 0), (0, 1)), 5, SIZE))  # Lighter, same position
+    builder.add(board_of({(9, 9): 1}), 2, ((10, 10), (8, 8)))
+    assert builder.write(path) == 2
+
+    book = OpeningBook(path)
+    try:
+        assert book.count == 2 and book.size == SIZE
+        keys = [key for key, _, _ in book.entries()]
+        assert keys == sorted(keys)
+        for s in range(len(SYMMETRIES)):
+            assert book.lookup(board_of(STONES, s), 1) == transform_turn(REPLY, s, SIZE)
+        assert book.lookup(board_of(STONES), 2) is None
+        assert book.lookup(np.zeros((15, 15), dtype=int), 1) is None
+    finally:
+        book.close()
+
+    merged = BookBuilder(SIZE)
+    merged.load(path)
+    merged.load(path)
+    assert sorted(merged.moves) == keys
+    assert sorted(sum(counts.values()) for counts in merged.moves.values()) == [2, 6]  # Weights add up
+
+
+def test_open_book_rejects_other_files(tmp_path):
+    assert open_book(str(tmp_path / "missing.book")) is None
+    path = tmp_path / "bad.book"
+    path.write_bytes(b"not a book at all")
+    assert open_book(str(path)) is None
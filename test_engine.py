@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+import kernels
+import reference
+from engine import EngineState
+from transposition import board_hash
+
+# EngineState's incremental data against a full recompute, over random
+# make/unmake sequences.
+
+SIZE = 19
+
+
+def random_walk(seed, steps=150, check_every=10):
+    """Random makes and unmakes on a fresh state; yields the state every check_every steps"""
+    rng = random.Random(seed)
+    state = EngineState(SIZE)
+    placed = []
+    for step in range(steps):
+        if placed and rng.random() < 0.3:
+            x, y = placed.pop(rng.randrange(len(placed)))
+            state.unmake(x, y)
+        else:
+            x, y = rng.choice(state.candidate_moves())
+            player = rng.choice((1, 2))
+            won = state.make(x, y, player)
+            placed.append((x, y))
+            assert won == state.check_win_at(x, y)
+            if won:
+                assert reference.check_win(state.board, player)
+        if step % check_every == 0:
+            yield state
+    for x, y in reversed(placed):
+        state.unmake(x, y)
+    yield state
+
+
+def candidate_scan(board):
+    """EngineState.candidate_moves as it was before the frontier"""
+    moves = set()
+    for i in range(SIZE):
+        for j in range(SIZE):
+            if board[i, j] == 0:
+                for dx in range(-2, 3):
+                    for dy in range(-2, 3):
+                        ni, nj = i + dx, j + dy
+                        if 0 <= ni < SIZE and 0 <= nj < SIZE and board[ni, nj] != 0:
+                            moves.add((i, j))
+    return moves or {(SIZE // 2, SIZE // 2)}
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_score_and_hash_match_recompute(seed):
+    for state in random_walk(seed):
+        fresh = EngineState(SIZE, state.board.copy())
+        assert state.score == fresh.score == kernels.evaluate_board(state.board)
+        assert state.contrib == fresh.contrib
+        assert state.hash == board_hash(state.board)
+    assert state.score == 0 and not state.board.any()
+    assert state.hash == 0
+
+
+def test_custom_weights():
+    weights = ((2, (1, 2, 3, 4)), (1, (-5, -6, -7, -8)))
+    rng = random.Random(1)
+    state = EngineState(SIZE, weights=weights)
+    for _ in range(60):
+        x, y = rng.choice(state.candidate_moves())
+        state.make(x, y, rng.choice((1, 2)))
+    assert state.score == EngineState(SIZE, state.board.copy(), weights).score
+    assert state.score == int(kernels._score_table(weights)[kernels.window_codes(state.board)].sum())
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_frontier_matches_candidate_scan(seed):
+    for state in random_walk(seed):
+        assert set(state.candidate_moves()) == candidate_scan(state.board)
+        assert state.frontier == EngineState(SIZE, state.board.copy()).frontier
+    assert state.candidate_moves() == [(SIZE // 2, SIZE // 2)]
+
+
+def test_frontier_at_the_edge():
+    state = EngineState(SIZE)
+    state.make(0, 0, 1)
+    state.make(18, 18, 2)
+    assert set(state.candidate_moves()) == candidate_scan(state.board)
+    assert len(state.frontier) == 2 * 8
@@ -0,0 +1,70 @@
+import random
+
+import numpy as np
+import pytest
+
+import kernels
+import reference
+import rules
+
+# The NumPy kernels against the board loops they replaced (reference.py), on
+# random boards, and the backends of rules.Position against each other.
+
+SIZE = 19
+DIRECTIONS = kernels.DIRECTIONS
+
+
+def on_board(x, y):
+    return 0 <= x < SIZE and 0 <= y < SIZE
+
+
+def random_board(rng, fill):
+    """Random stones on about fill of the cells, in runs along the lines now and then"""
+    board = np.zeros((SIZE, SIZE), dtype=int)
+    for _ in range(int(fill * SIZE * SIZE)):
+        x, y = rng.randrange(SIZE), rng.randrange(SIZE)
+        dx, dy = rng.choice(DIRECTIONS)
+        player = rng.choice((1, 2))
+        for step in range(rng.choice((1, 1, 1, 4, 5, 6))):
+            if on_board(x + step * dx, y + step * dy):
+                board[x + step * dx, y + step * dy] = player
+    return board
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_kernels_match_loops(seed):
+    rng = random.Random(seed)
+    board = random_board(rng, rng.choice((0.02, 0.1, 0.3)))
+    assert kernels.evaluate_board(board) == reference.evaluate_board(board)
+    for player in (1, 2):
+        assert kernels.has_open_five(board, player) == reference.has_open_five(board, player)
+        assert kernels.check_win(board, player) == reference.check_win(board, player)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_backends_agree(seed):
+    rng = random.Random(seed)
+    positions = [rules.Position(SIZE, backend=backend) for backend in rules.BACKENDS]
+    while not positions[0].game_over and positions[0].empty > SIZE * SIZE - 80:
+        x, y = rng.choice(positions[0].candidate_moves())
+        for position in positions:
+            position.place(x, y)
+        answers = {(position.evaluate(), position.check_win(1), position.check_win(2),
+                    position.has_open_five(1), position.has_open_five(2)) for position in positions}
+        assert len(answers) == 1
+    assert len({rules.tactical_move(position) for position in positions}) == 1
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        rules.Position(SIZE, backend="gpu")
+
+
+def test_tables_cached_on_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(kernels, "TABLE_CACHE", str(tmp_path))
+    cached = kernels._score_table.__wrapped__  # Under the per-process lru_cache
+    built = cached(kernels.WEIGHTS)
+    assert [path.suffix for path in tmp_path.iterdir()] == [".npy"]
+    monkeypatch.setattr(kernels, "_digits", None)  # Loading must not rebuild
+    assert np.array_equal(cached(kernels.WEIGHTS), built)
+    assert np.array_equal(built, kernels._score_table(kernels.WEIGHTS))
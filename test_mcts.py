@@ -0,0 +1,44 @@
+import pytest
+
+from engine import EngineState
+from mcts import MCTS
+
+# Monte Carlo tree search finds the immediate wins.
+
+SIZE = 19
+
+
+def position(stones):
+    state = EngineState(SIZE)
+    for player, cells in stones.items():
+        for x, y in cells:
+            state.make(x, y, player)
+    return state
+
+
+def play(state, turn, player):
+    return any([state.make(x, y, player) for x, y in turn])
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_completes_a_four(seed):
+    state = position({2: [(9, y) for y in range(5, 9)], 1: [(3, 3), (4, 12), (14, 6), (12, 14)]})
+    board = state.board.copy()
+    tree = MCTS(state, playouts=2048, seed=seed)
+    turn = tree.search(2)
+    assert (state.board == board).all()  # Left as it was
+    assert tree.playouts >= 2048
+    assert play(state, turn, 2)
+
+
+def test_one_stone_left():
+    state = position({1: [(x, 4) for x in range(6, 11)], 2: [(3, 3), (9, 9), (10, 10), (12, 12)]})
+    turn = MCTS(state, playouts=1024, seed=0).search(1, stones=1)
+    assert len(turn) == 1 and turn[0] in ((5, 4), (11, 4))
+
+
+def test_restricted_root():
+    state = position({2: [(9, y) for y in range(5, 9)], 1: [(3, 3), (4, 12)]})
+    winning, other = ((9, 4), (9, 9)), ((0, 0), (0, 1))
+    assert MCTS(state, playouts=512, seed=0).search(2, turns=[other, winning]) == winning
+    assert MCTS(state, playouts=512, seed=0).search(2, turns=[other]) == other
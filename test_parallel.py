@@ -0,0 +1,111 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ai_worker
+import rules
+from parallel import ParallelSearch, merge_results, split_root
+from search import WIN_SCORE
+
+# Splitting the root between workers and merging their results.
+
+TURNS = [((0, 0), (0, 1)), ((1, 0), (1, 1)), ((2, 0), (2, 1)), ((3, 0), (3, 1)), ((4, 0), (4, 1))]
+
+
+def result(iterations, nodes=10):
+    """A worker's result from its (depth, turn, score) iterations"""
+    return {"iterations": [(depth, turn, score, 0.01 * depth) for depth, turn, score in iterations], "nodes": nodes}
+
+
+def midgame():
+    position = rules.Position(19)
+    for x, y in ((9, 9), (10, 10), (8, 8), (10, 9), (9, 10), (11, 11), (8, 10), (7, 9), (12, 12)):
+        position.place(x, y)
+    return position
+
+
+def test_split_root_deals_every_turn_once():
+    shares = split_root(TURNS, 3)
+    assert sorted(itertools.chain(*shares)) == sorted(TURNS)
+    assert shares[0][0] == TURNS[0]
+    assert split_root(TURNS[:2], 4) == [[TURNS[0]], [TURNS[1]]]
+
+
+@pytest.mark.parametrize("player", (1, 2))
+def test_merge_ignores_the_order_of_results(player):
+    sign = 1 if player == 2 else -1
+    results = [
+        result([(1, TURNS[0], 50 * sign), (2, TURNS[0], 20 * sign), (3, TURNS[0], 5 * sign)]),
+        result([(1, TURNS[1], 40 * sign), (2, TURNS[1], 20 * sign)]),  # Tied at depth 2, later in the root
+        result([(1, TURNS[2], 90 * sign), (2, TURNS[2], -10 * sign)]),
+    ]
+    merged = {str(merge_results(list(order), player, TURNS)) for order in itertools.permutations(results)}
+    assert len(merged) == 1
+    assert merge_results(results, player, TURNS) == {"turn": TURNS[0], "depth": 2, "nodes": 30}
+
+
+def test_merge_takes_the_fastest_win():
+    results = [
+        result([(1, TURNS[3], 100), (2, TURNS[3], WIN_SCORE - 1)]),
+        result([(1, TURNS[4], WIN_SCORE)]),
+        result([(1, TURNS[0], 100), (2, TURNS[0], 90), (3, TURNS[0], 80)]),
+    ]
+    for order in itertools.permutations(results):
+        assert merge_results(list(order), 2, TURNS)["turn"] == TURNS[4]
+
+
+def test_lost_shares_do_not_limit_the_depth():
+    results = [
+        result([(1, TURNS[0], -WIN_SCORE + 1)]),
+        result([(1, TURNS[1], 10), (2, TURNS[1], 5), (3, TURNS[1], 1)]),
+    ]
+    assert merge_results(results, 2, TURNS) == {"turn": TURNS[1], "depth": 3, "nodes": 20}
+
+
+def test_one_worker_is_deterministic():
+    position = midgame()
+    packed = ai_worker.encode_position(position)
+    turns = {ai_worker.search_position(packed, position.turn, 2, None, None, max_depth=2)["turn"]
+             for _ in range(3)}
+    assert len(turns) == 1
+
+
+def test_parallel_search_runs_the_plan_then_the_shares():
+    position = midgame()
+    packed = ai_worker.encode_position(position)
+    with ThreadPoolExecutor(2) as pool:
+        def submit_shares(plan):
+            return [pool.submit(ai_worker.search_position, packed, position.turn, 2, None, None, "turn",
+                                share, 2, False, "minimax", False, False)
+                    for share in split_root(plan["turns"], 2)]
+
+        plan = pool.submit(ai_worker.plan_position, packed, position.turn, 2, None, None)
+        search = ParallelSearch(plan, submit_shares, position.turn)
+        finished = threading.Event()
+        search.add_done_callback(lambda _: finished.set())
+        assert finished.wait(60)
+        merged = search.result()
+    assert search.done()
+    assert len(search.futures) == 2
+    assert merged["turn"] in search.plan["turns"]
+    assert merged["depth"] == 2
+
+
+def test_parallel_search_returns_a_planned_win():
+    position = rules.Position(19)
+    for x, y in ((9, 9), (0, 0), (0, 2), (9, 10), (9, 11), (2, 0), (2, 2), (9, 12), (9, 13), (4, 0), (4, 2)):
+        position.place(x, y)
+    packed = ai_worker.encode_position(position)
+    with ThreadPoolExecutor(1) as pool:
+        plan = pool.submit(ai_worker.plan_position, packed, position.turn, 2, None, None)
+        search = ParallelSearch(plan, lambda plan: pytest.fail("a won position is not split"), position.turn)
+        finished = threading.Event()
+        search.add_done_callback(lambda _: finished.set())
+        assert finished.wait(60)
+        merged = search.result()
+    assert merged["reason"] == "threat_win"
+    for x, y in merged["turn"]:
+        position.place(x, y)
+    assert position.winner == 1
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from records import HEADER, STONE, RecordReader, RecordWriter
+
+# Record files: writing and reading games back, and recovering from a write
+# cut short.
+
+GAME = [(9, 9, 299.5), (10, 10, 297.0), (10, 11, 296.2), (8, 8, 298.1)]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "games.c6r")
+
+
+def play(writer, moves=GAME, result=(1, "six"), size=19, time_limit=300):
+    writer.start(size, time_limit)
+    for x, y, clock in moves:
+        writer.move(x, y, clock)
+    if result is not None:
+        writer.finish(*result)
+
+
+def test_round_trip(path):
+    writer = RecordWriter(path)
+    play(writer)
+    play(writer, GAME[:3], (2, "timeout"), size=15, time_limit=60)
+    play(writer, GAME[:1], None)  # Still being played
+    reader = RecordReader(path)
+    games = list(reader)
+    assert [(g.size, g.time_limit, g.winner, g.reason) for g in games] == [
+        (19, 300, 1, "six"), (15, 60, 2, "timeout"), (19, 300, 0, "unfinished")]
+    assert games[0].moves == GAME
+    assert games[0].think_times() == pytest.approx([0.5, 3.0, 0.8, 1.4])
+
+    writer.move(*GAME[1])  # The reader sees the game grow
+    reader.refresh()
+    assert len(reader) == 3 and reader[2].moves == GAME[:2]
+    writer.close()
+    reader.close()
+
+
+def test_games_without_stones_are_not_written(path):
+    writer = RecordWriter(path)
+    for _ in range(3):  # A new Connect6 and two rematches
+        writer.start(19, 300)
+    play(writer, [], (2, "timeout"))  # A result is kept even without stones
+    writer.start(19, 300)
+    writer.close()
+    assert os.path.getsize(path) == HEADER.size
+    assert [(g.winner, g.moves) for g in RecordReader(path)] == [(2, [])]
+
+
+@pytest.mark.parametrize("torn", [
+    STONE.pack(1, 2, 3),  # A stone written before its header was updated
+    b"C6\x01",  # Part of the next game's header
+    bytes(HEADER.size) + STONE.pack(1, 2, 3),  # A first stone without its header
+])
+def test_torn_tail_is_dropped(path, torn):
+    writer = RecordWriter(path)
+    play(writer)
+    writer.close()
+    complete = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(torn)
+
+    writer = RecordWriter(path)
+    assert os.path.getsize(path) == complete
+    play(writer, GAME[:2], (2, "six"))
+    writer.close()
+    games = list(RecordReader(path))
+    assert [(g.winner, g.moves) for g in games] == [(1, GAME), (2, GAME[:2])]
@@ -0,0 +1,47 @@
+from engine import EngineState
+from search import WIN_BOUND, WIN_SCORE, Searcher, from_tt, to_tt, win_score
+from transposition import TranspositionTable
+
+# Win scores by ply and their transposition table conversion.
+
+
+def three_fours():
+    """Player 2 has three open lines of four: two stones cannot stop them all"""
+    state = EngineState(19)
+    for x in (2, 8, 14):
+        for y in range(7, 11):
+            state.make(x, y, 2)
+    for x, y in ((5, 3), (11, 15), (16, 2)):
+        state.make(x, y, 1)
+    return state
+
+
+def test_immediate_win_scores_highest():
+    searcher = Searcher(three_fours(), max_depth=3)
+    turn = searcher.search(2)
+    assert [it[:3] for it in searcher.iterations] == [(1, turn, WIN_SCORE)]
+
+
+def test_loss_is_scored_by_its_distance():
+    searcher = Searcher(three_fours(), TranspositionTable(), max_depth=3, root_pairs=10)
+    for _ in range(2):  # The second search reads the scores the first one stored
+        searcher.search(1)
+        assert searcher.iterations[-1][0] == 2
+        assert searcher.iterations[-1][2] == win_score(2, 1) == WIN_SCORE - 1
+
+
+def test_stone_mode_scores_by_stone():
+    searcher = Searcher(three_fours(), mode="stone", max_depth=4)
+    searcher.search(2)
+    # Two stones of player 2: the second, at ply 2, makes the six.
+    assert searcher.iterations[-1][2] == win_score(2, 2)
+
+
+def test_table_scores_are_relative_to_the_node():
+    for score in (win_score(2, 5), win_score(1, 5), 1234, -1234):
+        stored = to_tt(score, 3)
+        assert from_tt(stored, 3) == score
+    # A six two plies below a node at ply 3 is two plies below that node
+    # wherever it is found again.
+    assert from_tt(to_tt(win_score(2, 5), 3), 1) == win_score(2, 3)
+    assert win_score(2, 5) >= WIN_BOUND and win_score(1, 5) <= -WIN_BOUND
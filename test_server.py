@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+import ai_worker
+from server import MAX_LINE, GameServer
+
+# The server's line protocol and its search queue, in process on a free port.
+
+
+@pytest.fixture(scope="module", autouse=True)
+def pool():
+    yield
+    ai_worker.shutdown_pool()
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, line):
+        self.writer.write(line.encode() + b"\n")
+        await self.writer.drain()
+
+    async def read(self, timeout=30):
+        return (await asyncio.wait_for(self.reader.readline(), timeout)).decode().rstrip("\n")
+
+    async def ask(self, line):
+        await self.send(line)
+        return await self.read()
+
+
+def serve(test, queue=2):
+    """Run test(server, connect) against a GameServer on a free port"""
+    async def main():
+        game_server = GameServer(workers=1, queue=queue, max_depth=1)
+        server = await asyncio.start_server(game_server.handle, "127.0.0.1", 0, limit=MAX_LINE)
+        port = server.sockets[0].getsockname()[1]
+
+        clients = []
+
+        async def connect():
+            clients.append(Client(*await asyncio.open_connection("127.0.0.1", port)))
+            return clients[-1]
+
+        async with server:
+            await test(game_server, connect)
+            for client in clients:
+                client.writer.close()
+            while game_server.sessions:  # Let the sessions see the clients go
+                await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+
+
+def test_human_game():
+    async def test(server, connect):
+        x, o = await connect(), await connect()
+        words = (await x.ask("NEW human 60")).split()
+        assert words[0] == "GAME" and words[2:] == ["1", "60"]
+        game_id = words[1]
+        assert await x.ask("MOVE 9 9") == "ERR waiting for an opponent"
+        assert await o.ask(f"JOIN {game_id}") == f"GAME {game_id} 2 60"
+        assert await o.ask(f"JOIN {game_id}") == f"ERR no open game {game_id}"
+        assert await x.ask("MOVE 9 9") == "OK"
+        assert await o.read() == "MOVED 9 9"
+        assert await x.ask("MOVE 9 10") == "ERR not your turn"
+        assert await o.ask("move 10 10") == "OK"
+        assert (await o.ask("MOVE 9 9")).startswith("ERR")  # Taken
+        assert await o.ask("MOVE 10 11") == "OK"
+        assert await x.read() == "MOVED 10 10" and await x.read() == "MOVED 10 11"
+        assert await x.ask("BOARD") == "BOARD 1 2 9,9 10,10 10,11"
+        assert (await x.ask("CLOCK")).startswith("CLOCK ")
+        assert await o.ask("QUIT") == "BYE"
+        assert await x.read() == "END 1 resigned"
+        assert server.games == {}
+
+    serve(test)
+
+
+def test_errors():
+    async def test(server, connect):
+        client = await connect()
+        assert await client.ask("FOO") == "ERR unknown command FOO"
+        assert await client.ask("BOARD") == "ERR no game, send NEW or JOIN first"
+        assert await client.ask("NEW robot") == "ERR opponent must be ai or human"
+        assert await client.ask("NEW ai 0") == "ERR time limit must be 1 to 86400 seconds"
+        assert (await client.ask("NEW ai 60")).startswith("GAME ")
+        assert await client.ask("MOVE 9") == "ERR wrong arguments for MOVE"
+        assert (await client.ask("MOVE a b")).startswith("ERR")
+        await client.send("BOARD " + "x" * MAX_LINE)  # Longer than a line may be
+        assert await client.reader.read() == b""
+        await asyncio.sleep(0.05)
+        assert server.sessions == 0 and server.games == {}
+
+    serve(test)
+
+
+def test_ai_game():
+    async def test(server, connect):
+        client = await connect()
+        assert (await client.ask("NEW ai 60")).startswith("GAME ")
+        words = (await client.ask("MOVE 9 9")).split()
+        assert words[:2] == ["OK", "AI"] and len(words) == 6
+        stones = [f"{words[k]},{words[k + 1]}" for k in (2, 4)]
+        assert await client.ask("BOARD") == f"BOARD 1 2 9,9 {' '.join(stones)}"
+        assert (await client.ask("ANALYZE")).startswith("BEST ")
+        assert server.searches >= 2
+
+    serve(test)
+
+
+def test_busy_server_stops_reading():
+    async def test(server, connect):
+        client = await connect()
+        assert (await client.ask("NEW ai 60")).startswith("GAME ")
+        await server.slots.acquire()  # Every search slot is taken
+        await client.send("ANALYZE")
+        await client.send("CLOCK")
+        with pytest.raises(asyncio.TimeoutError):
+            await client.read(timeout=0.5)
+        assert server.searches == 0
+        server.slots.release()
+        assert (await client.read()).startswith("BEST ")  # Then the queued line, in order
+        assert (await client.read()).startswith("CLOCK ")
+
+    serve(test, queue=1)
@@ -0,0 +1,82 @@
+from itertools import combinations
+
+from engine import EngineState
+from threats import ThreatSolver
+
+# The threat solver on positions with a known answer.
+
+SIZE = 19
+
+
+def position(stones):
+    """EngineState with the given {player: [(x, y), ...]} stones"""
+    state = EngineState(SIZE)
+    for player, cells in stones.items():
+        for x, y in cells:
+            state.make(x, y, player)
+    return state
+
+
+def row(x, ys):
+    return [(x, y) for y in ys]
+
+
+def can_win_now(state, player):
+    """Whether player can make six with the two stones of one turn"""
+    board = state.board
+    for x in range(SIZE):
+        for y in range(SIZE):
+            for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                cells = [(x + k * dx, y + k * dy) for k in range(6)]
+                if all(0 <= cx < SIZE and 0 <= cy < SIZE for cx, cy in cells):
+                    values = [board[c] for c in cells]
+                    if 3 - player not in values and values.count(player) >= 4:
+                        return True
+    return False
+
+
+def test_four_is_completed():
+    state = position({2: row(9, range(5, 9)), 1: [(3, 3), (15, 15)]})
+    turn = ThreatSolver(state).find_win(2)
+    assert turn is not None
+    for x, y in turn:
+        state.make(x, y, 2)
+    assert state.check_win(2)
+
+
+def test_double_four_wins_against_any_reply():
+    # Two open threes far apart: making both fours leaves more threats
+    # than the defender's two stones can block.
+    state = position({2: row(5, range(5, 8)) + row(12, range(5, 8)), 1: [(0, 18), (18, 0), (9, 15)]})
+    turn = ThreatSolver(state).find_win(2)
+    assert turn is not None
+    for x, y in turn:
+        state.make(x, y, 2)
+    replies = [(x, y) for x in (5, 12) for y in range(SIZE) if not state.board[x, y]]
+    for reply in combinations(replies, 2):
+        for x, y in reply:
+            state.make(x, y, 1)
+        assert can_win_now(state, 2), reply
+        for x, y in reply:
+            state.unmake(x, y)
+
+
+def test_no_win_in_a_quiet_position():
+    state = position({1: [(9, 9), (10, 10)], 2: [(8, 10), (10, 8)]})
+    assert ThreatSolver(state).find_win(2) is None
+    assert ThreatSolver(state).find_win(1) is None
+
+
+def test_safe_turns_block_the_four():
+    state = position({1: row(9, range(5, 9)), 2: [(3, 3), (15, 15)]})
+    block, away = ((9, 4), (9, 9)), ((0, 0), (0, 1))
+    solver = ThreatSolver(state)
+    assert solver.safe_turns(2, [away, block]) == [block]
+    assert list(solver.cells) == list(state.cells)  # Turns are taken back
+
+
+def test_budget_gives_up():
+    state = position({2: row(9, range(5, 9))})
+    solver = ThreatSolver(state, max_nodes=0)
+    assert solver.find_win(2) is None
+    assert solver.safe_turns(1, [((0, 0), (0, 1))]) is None
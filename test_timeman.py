@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from engine import EngineState
+from search import Searcher
+from timeman import TimeManager
+
+# The time budget of a search and its soft and hard limits.
+
+
+def test_budget_is_a_share_of_the_clock():
+    tm = TimeManager(300, 300)
+    assert tm.budget == pytest.approx(min((300 - 5) / 25, 300 * 0.05))
+    assert tm.soft_limit == pytest.approx(tm.budget / 2)
+    assert TimeManager(300, 300, stones=2).budget == pytest.approx(tm.budget / 2)
+
+
+def test_budget_shrinks_with_the_clock():
+    budgets = [TimeManager(remaining, 300).budget for remaining in (300, 100, 30, 10)]
+    assert budgets == sorted(budgets, reverse=True)
+
+
+def test_reserve_is_never_spent():
+    assert TimeManager(5, 300).budget == 0.0  # Nothing left above the 5 s reserve
+    for remaining in (5.01, 5.1, 6):
+        tm = TimeManager(remaining, 300)
+        assert tm.budget <= (remaining - 5) / 2
+
+
+def test_minimum_time_while_the_clock_allows():
+    assert TimeManager(60, 60, expected_turns=10 ** 6).budget == pytest.approx(0.05)
+
+
+def test_soft_and_hard_limits():
+    tm = TimeManager(300, 300)
+    assert tm.can_start_iteration() and not tm.expired()
+    tm.start_time -= tm.soft_limit
+    assert not tm.can_start_iteration() and not tm.expired()
+    tm.start_time -= tm.budget - tm.soft_limit
+    assert tm.expired()
+
+
+def test_search_stops_within_the_budget():
+    state = EngineState(19)
+    for x, y, player in ((9, 9, 1), (10, 10, 2), (8, 10, 2), (10, 8, 1), (11, 9, 1)):
+        state.make(x, y, player)
+    tm = TimeManager(10, 300, min_time=0.2)
+    assert tm.budget == pytest.approx(0.2)
+    searcher = Searcher(state, max_depth=20)
+    start = time.perf_counter()
+    turn = searcher.search(2, tm)
+    assert time.perf_counter() - start < tm.budget + 0.15
+    assert searcher.depth_reached >= 1
+    assert turn == searcher.iterations[-1][1]
+    assert not state.board[turn[0]]  # The board is left as it was
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+import tournament
+from tournament import elo, load_results, ratings, report, schedule, score_interval
+
+# The tournament's schedule and its statistics.
+
+
+def game(first, second, winner):
+    return {"players": {1: first, 2: second}, "winner": winner, "reason": "six"}
+
+
+def test_wilson_interval():
+    assert score_interval([0.5] * 100) == pytest.approx((0.5, 0.4038, 0.5962), abs=1e-4)
+    mean, low, high = score_interval([1.0] * 10)
+    assert (mean, high) == (1.0, 1.0)
+    assert low == pytest.approx(10 / (10 + 1.96 ** 2))  # Wide after a short one-sided sample
+    assert score_interval([0.0, 1.0]) == pytest.approx((0.5, 0.0945, 0.9055), abs=1e-4)
+
+
+def test_elo():
+    assert elo(0.5) == 0
+    assert elo(0.75) == pytest.approx(400 * 0.47712, abs=0.01)
+    assert elo(0.0) == pytest.approx(-elo(1.0)) == pytest.approx(-1200, abs=1)  # Clamped
+
+
+def test_ratings():
+    results = [game("a", "b", 1)] * 3 + [game("b", "a", 1)]  # a scores 3 of 4
+    fitted = ratings(results)
+    assert fitted["a"] == pytest.approx(-fitted["b"])
+    assert 0 < fitted["a"] - fitted["b"] < elo(0.75)  # The virtual draw pulls towards 0
+    even = ratings([game("a", "b", 1), game("b", "a", 1), game("a", "b", None), game("b", "a", None)])
+    assert even == pytest.approx({"a": 0.0, "b": 0.0}, abs=1e-6)
+
+
+def test_ratings_order_a_chain():
+    results = []
+    for strong, weak in (("a", "b"), ("b", "c")):
+        results += [game(strong, weak, 1), game(weak, strong, 2)] * 3 + [game(strong, weak, 2)]
+    fitted = ratings(results)
+    assert fitted["a"] > fitted["b"] > fitted["c"]
+    assert sum(fitted.values()) == pytest.approx(0.0, abs=1e-6)
+
+
+def test_schedule():
+    jobs = schedule(["x", "a", "m"], 4, seed=7)
+    assert jobs == schedule(["a", "m", "x"], 4, seed=7)
+    assert len(jobs) == 3 * 4 and len({job["id"] for job in jobs}) == len(jobs)
+    assert all("-s7-" in job["id"] for job in jobs)
+    assert not {job["id"] for job in jobs} & {job["id"] for job in schedule(["a", "m", "x"], 4, seed=8)}
+    first, second = jobs[:2]  # Each opening is played with the colours swapped
+    assert first["opening"] == second["opening"]
+    assert first["players"] == {1: second["players"][2], 2: second["players"][1]}
+
+
+def test_report_and_torn_results_file(tmp_path):
+    path = tmp_path / "results.jsonl"
+    lines = [json.dumps(dict(game("a", "b", 1), id=str(k))) for k in range(3)]
+    path.write_text("\n".join(lines) + '\n{"id": "3", "play')
+    results = load_results(str(path))
+    assert [result["id"] for result in results] == ["0", "1", "2"]
+    summary = report(results)
+    assert summary["games"] == 3
+    pair = summary["pairs"][0]
+    assert (pair["player"], pair["wins"], pair["losses"], pair["score"]) == ("a", 3, 0, 1.0)
+    assert pair["score_ci"][0] == pytest.approx(3 / (3 + tournament.Z95 ** 2), abs=1e-3)
+    assert list(summary["ratings"]) == ["a", "b"]
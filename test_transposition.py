@@ -0,0 +1,68 @@
+from engine import EngineState
+from search import Searcher
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+# The transposition table's replacement policy and counters.
+
+BITS = 4
+OTHER = 1 << BITS  # a key for the same slot as key 0
+
+
+def test_probe_counts_hits_and_misses():
+    tt = TranspositionTable(BITS)
+    assert tt.probe(5) is None
+    tt.store(5, 3, EXACT, 42, ((1, 2),))
+    assert tt.probe(5) == (3, EXACT, 42, ((1, 2),))
+    assert tt.probe(5 + OTHER) is None  # Same slot, other position
+    stats = tt.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 2, 1)
+    assert stats["hit_rate"] == 1 / 3
+
+
+def test_deeper_entry_of_this_search_is_kept():
+    tt = TranspositionTable(BITS)
+    tt.store(0, 4, LOWER, 10, None)
+    tt.store(OTHER, 2, UPPER, 20, None)
+    assert tt.probe(0) is not None and tt.probe(OTHER) is None
+    tt.store(OTHER, 4, UPPER, 20, None)  # As deep: replaces
+    assert tt.probe(OTHER) == (4, UPPER, 20, None)
+    assert tt.stats()["overwrites"] == 1
+
+
+def test_same_position_is_always_replaced():
+    tt = TranspositionTable(BITS)
+    tt.store(0, 5, EXACT, 1, None)
+    tt.store(0, 1, EXACT, 2, None)
+    assert tt.probe(0) == (1, EXACT, 2, None)
+    assert tt.stats()["overwrites"] == 0
+
+
+def test_entries_of_an_earlier_search_give_way():
+    tt = TranspositionTable(BITS)
+    tt.store(0, 6, EXACT, 1, None)
+    tt.new_search()
+    tt.store(OTHER, 1, EXACT, 2, None)
+    assert tt.probe(OTHER) == (1, EXACT, 2, None)
+    assert tt.probe(0) is None
+
+
+def test_clear():
+    tt = TranspositionTable(BITS)
+    tt.store(0, 1, EXACT, 1, None)
+    tt.probe(0)
+    tt.clear()
+    assert tt.probe(0) is None
+    assert tt.stats()["hits"] == 0 and tt.stats()["stores"] == 0
+
+
+def test_table_cuts_nodes():
+    state = EngineState(19)
+    for x, y, player in ((9, 9, 1), (10, 10, 2), (8, 10, 2), (10, 8, 1), (11, 9, 1)):
+        state.make(x, y, player)
+    counts = []
+    for bits in (1, 16):  # A two-slot table remembers next to nothing
+        searcher = Searcher(state, TranspositionTable(bits), mode="stone", max_depth=4)
+        searcher.search(2)
+        counts.append(searcher.nodes)
+    assert searcher.tt.stats()["hits"] > 0
+    assert counts[1] < counts[0]
@@ -0,0 +1,230 @@
+import time
+from functools import lru_cache
+from itertools import combinations
+
+from kernels import DIRECTIONS
+
+# Threat-space search for Connect6.
+#
+# A threat is a 6-cell window holding four or five of a player's stones and
+# no opponent stone: with the two stones of a turn the player completes it.
+# The number of threats is the number of stones the opponent needs to block
+# them all. A turn that leaves three or more wins outright. A turn that
+# leaves exactly two is a double threat: the defender has to spend both
+# stones blocking, so their replies are just the pairs of cells that hit
+# every threat window, and the attacker moves again.
+#
+# The solver only plays such double-threat turns and the forced replies, so
+# a found win is a real forced win however many turns deep it is. It cannot
+# see wins that go through single threats (the defender has a free stone);
+# those are left to the minimax search. It has its own node and time budget
+# and works on a private copy of the padded cell list, not the EngineState.
+
+WINDOW = 6
+SCORE = (0, 0, 1, 4, 16, 64, 0)  # candidate weight by own stones in a window
+MAX_TURNS = 4  # attacking turns searched, the last one must win outright
+CANDIDATES = 10  # best cells paired into attacking turns
+NODE_BUDGET = 5000  # solver nodes per AI move
+TIME_SHARE = 0.25  # share of the move's time budget the solver may use
+
+
+class BudgetExceeded(Exception):
+    """Raised inside the solver when its node or time budget runs out"""
+
+
+@lru_cache(maxsize=None)
+def _windows(size, width, pad):
+    """Every on-board 6-cell window as a tuple of padded indices, and the
+    windows through each padded index"""
+    windows = []
+    for x in range(size):
+        for y in range(size):
+            for dx, dy in DIRECTIONS:
+                ex, ey = x + (WINDOW - 1) * dx, y + (WINDOW - 1) * dy
+                if 0 <= ex < size and 0 <= ey < size:
+                    windows.append(tuple((x + k * dx + pad) * width + y + k * dy + pad for k in range(WINDOW)))
+    through = {}
+    for w, window in enumerate(windows):
+        for idx in window:
+            through.setdefault(idx, []).append(w)
+    return windows, through
+
+
+def hitting_sets(threats):
+    """Stones the defender needs to block every threat.
+
+    threats: the empty cells of each threat window. Returns (1, cells),
+    (2, pairs) or (3, None) when two stones are not enough.
+    """
+    cells = sorted(set().union(*threats))
+    singles = [c for c in cells if all(c in empties for empties in threats)]
+    if singles:
+        return 1, singles
+    pairs = [(a, b) for a, b in combinations(cells, 2)
+             if all(a in empties or b in empties for empties in threats)]
+    if pairs:
+        return 2, pairs
+    return 3, None
+
+
+class ThreatSolver:
+    def __init__(self, state, max_nodes=20000, time_limit=None, max_turns=MAX_TURNS, candidates=CANDIDATES):
+        from engine import PAD
+
+        self.cells = list(state.cells)
+        self.coords = state.coords
+        self.index = state.index
+        self.windows, self.through = _windows(state.size, state.width, PAD)
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit  # seconds, None for no limit
+        self.max_turns = max_turns
+        self.candidates = candidates
+        self.nodes = 0
+        self.start_time = time.perf_counter()  # the budget covers every call on this solver
+
+    def find_win(self, player, stones=2):
+        """A turn for player that starts a forced win, or None.
+
+        Returns a tuple of (x, y) moves; None also when the budget ran out.
+        """
+        try:
+            turn = self.attack(player, stones, self.max_turns)
+        except BudgetExceeded:
+            return None
+        return tuple(sorted(self.coords[idx] for idx in turn)) if turn else None
+
+    def safe_turns(self, player, turns):
+        """The turns after which the opponent has no forced win.
+
+        Returns None when the budget ran out before every turn was checked.
+        """
+        opponent = 3 - player
+        safe = []
+        try:
+            for turn in turns:
+                placed = [self.index(x, y) for x, y in turn]
+                self._place(placed, player)
+                try:
+                    if self.attack(opponent, 2, self.max_turns) is None:
+                        safe.append(turn)
+                finally:
+                    self._place(placed, 0)
+        except BudgetExceeded:
+            return None
+        return safe
+
+    def _place(self, cells, value):
+        for idx in cells:
+            self.cells[idx] = value
+
+    def _tick(self):
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise BudgetExceeded()
+        if self.time_limit is not None and self.nodes % 64 == 0 \
+                and time.perf_counter() - self.start_time > self.time_limit:
+            raise BudgetExceeded()
+
+    def scan(self, attacker):
+        """One pass over all windows.
+
+        Returns (wins, must_block, scores): the empty cells of attacker
+        windows with four or more stones, of defender threat windows, and a
+        candidate weight per empty cell.
+        """
+        cells = self.cells
+        defender = 3 - attacker
+        wins, must_block, scores = [], [], {}
+        for window in self.windows:
+            own = theirs = 0
+            empties = []
+            for idx in window:
+                value = cells[idx]
+                if value == attacker:
+                    own += 1
+                elif value == defender:
+                    theirs += 1
+                else:
+                    empties.append(idx)
+            if theirs == 0 and own >= 2:
+                for idx in empties:
+                    scores[idx] = scores.get(idx, 0) + SCORE[own]
+                if own >= 4:
+                    wins.append(empties)
+            elif own == 0 and theirs >= 4:
+                must_block.append(empties)
+        return wins, must_block, scores
+
+    def threats_through(self, placed, player):
+        """Empty cells of player's threat windows through the placed stones"""
+        cells = self.cells
+        opponent = 3 - player
+        seen = set()
+        threats = []
+        for idx in placed:
+            for w in self.through[idx]:
+                if w in seen:
+                    continue
+                seen.add(w)
+                window = self.windows[w]
+                values = [cells[c] for c in window]
+                if opponent not in values and values.count(player) >= 4:
+                    threats.append([c for c in window if cells[c] == 0])
+        return threats
+
+    def attack(self, attacker, stones, turns_left):
+        """A winning turn for attacker as padded indices, or None"""
+        self._tick()
+        wins, must_block, scores = self.scan(attacker)
+        for empties in wins:
+            if len(empties) <= stones:
+                return tuple(empties)
+        if turns_left <= 1 or stones < 2:
+            return None
+        if must_block:
+            needed, _ = hitting_sets(must_block)
+            if needed > stones:
+                return None
+            for empties in must_block:
+                for idx in empties:
+                    scores[idx] = scores.get(idx, 0) + SCORE[5]
+
+        best = sorted(scores, key=scores.get, reverse=True)[:self.candidates]
+        for turn in combinations(best, 2):
+            if must_block and not all(turn[0] in e or turn[1] in e for e in must_block):
+                continue
+            self._place(turn, attacker)
+            try:
+                threats = self.threats_through(turn, attacker)
+                if not threats:
+                    continue
+                needed, replies = hitting_sets(threats)
+                if needed == 3:
+                    return turn
+                if needed == 2 and self.refutes_none(attacker, replies, turns_left):
+                    return turn
+            finally:
+                self._place(turn, 0)
+        return None
+
+    def refutes_none(self, attacker, replies, turns_left):
+        """True if attacker still wins after each forced defender reply"""
+        defender = 3 - attacker
+        for reply in replies:
+            self._place(reply, defender)
+            try:
+                if self.made_six(reply, defender):
+                    return False
+                if self.attack(attacker, 2, turns_left - 1) is None:
+                    return False
+            finally:
+                self._place(reply, 0)
+        return True
+
+    def made_six(self, placed, player):
+        cells = self.cells
+        for idx in placed:
+            for w in self.through[idx]:
+                if all(cells[c] == player for c in self.windows[w]):
+                    return True
+        return False
@@ -0,0 +1,38 @@
+import time
+
+# Time management for the AI search.
+#
+# The budget for a move is a share of the clock the player has left, so the
+# AI thinks longer early on and speeds up when it is short of time. A reserve
+# is never spent, which keeps the AI from losing on time.
+
+
+class TimeManager:
+    def __init__(self, remaining, time_limit, stones=1, expected_turns=25,
+                 reserve=None, min_time=0.05, max_fraction=0.05):
+        """Budget one search.
+
+        remaining: seconds left on the player's clock
+        time_limit: the full game clock in seconds
+        stones: how many separate searches share this turn's budget
+        """
+        if reserve is None:
+            reserve = min(5.0, time_limit * 0.02)
+        spare = max(0.0, remaining - reserve)
+        budget = min(spare / expected_turns, time_limit * max_fraction) / stones
+        # Never go below min_time unless the clock itself is that low.
+        self.budget = min(max(budget, min_time), spare * 0.5) if spare > 0 else 0.0
+        # An iteration started after the soft limit would rarely finish.
+        self.soft_limit = self.budget * 0.5
+        self.start_time = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start_time
+
+    def can_start_iteration(self):
+        """True while there is time to start another iterative deepening pass"""
+        return self.elapsed() < self.soft_limit
+
+    def expired(self):
+        """True once the hard budget for this search is used up"""
+        return self.elapsed() >= self.budget
@@ -0,0 +1,294 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import kernels
+import rules
+
+# Self-play tournaments between AI configurations.
+#
+# Every pair of configurations plays a number of openings; each opening is
+# a few random stones near the centre and is played twice with the colours
+# swapped, so neither side profits from a lucky opening or from moving
+# first. Games run in a pool of processes, one game per task, and every
+# finished game is appended to a JSON Lines file straight away. A game's id
+# is fixed by the pairing, the seed, the opening number and the colours, so
+# a run started again with the same arguments skips the games already in the
+# file and carries on where it stopped, and a run with another seed adds new
+# games to the same file.
+#
+# The report gives each pairing's score with a 95% Wilson confidence
+# interval (draws count half), which stays wide for short or one-sided
+# samples, and the matching Elo difference, and a rating per configuration fitted to all
+# games (Bradley-Terry, draws count half).
+#
+#   python tournament.py default aggressive --games 200
+#   python tournament.py --report tournament.jsonl
+
+# Search settings of a configuration, overridden per configuration below.
+# weights are the evaluation weights for the configuration's own stones and
+# the opponent's, from its own point of view (kernels.WEIGHTS for player 2).
+# clock is seconds per side for the game, None searches to max_depth.
+# engine "mcts" plays Monte Carlo tree search with the clock and/or playouts
+# rollouts per search.
+DEFAULTS = {
+    "engine": "minimax",
+    "playouts": None,
+    "mode": "turn",
+    "max_depth": 2,
+    "threats": True,
+    "weights": (dict(kernels.WEIGHTS)[2], dict(kernels.WEIGHTS)[1]),
+    "clock": None,
+}
+
+CONFIGS = {
+    "default": {},
+    "depth1": {"max_depth": 1},
+    "depth3": {"max_depth": 3},
+    "stone": {"mode": "stone", "max_depth": 4},
+    "no_threats": {"threats": False},
+    "aggressive": {"weights": ((100000, 15000, 2000, 3000), (-70000, -15000, -5000, -500))},
+    "defensive": {"weights": ((100000, 10000, 500, 3000), (-100000, -20000, -8000, -1000))},
+    "clock60": {"clock": 60},
+    "mcts": {"engine": "mcts", "playouts": 4000},
+    "mcts_clock60": {"engine": "mcts", "clock": 60},
+}
+
+OPENING_TURNS = 2  # random turns after the first stone
+OPENING_RADIUS = 3  # random stones stay this close to the centre
+RESULTS_PATH = "tournament.jsonl"
+Z95 = 1.96
+
+
+def settings(name, configs):
+    merged = dict(DEFAULTS)
+    merged.update(configs[name])
+    return merged
+
+
+def kernel_weights(own, opponent, player):
+    """kernels weights for a configuration playing player"""
+    if player == 2:
+        return (2, tuple(own)), (1, tuple(opponent))
+    return (1, tuple(-w for w in own)), (2, tuple(-w for w in opponent))
+
+
+def random_opening(size, seed):
+    """Stones of a random opening: the first stone and OPENING_TURNS turns"""
+    rng = random.Random(seed)
+    centre = size // 2
+    cells = [(x, y) for x in range(centre - OPENING_RADIUS, centre + OPENING_RADIUS + 1)
+             for y in range(centre - OPENING_RADIUS, centre + OPENING_RADIUS + 1)]
+    return rng.sample(cells, 1 + 2 * OPENING_TURNS)
+
+
+def schedule(names, games, seed):
+    """Every game of the tournament as a job dict, in a fixed order"""
+    names = sorted(names)  # ids do not depend on the order given
+    jobs = []
+    openings = (games + 1) // 2
+    for a in range(len(names)):
+        for b in range(a + 1, len(names)):
+            for k in range(openings):
+                opening_seed = seed * 1000003 + k
+                for first, second in ((names[a], names[b]), (names[b], names[a])):
+                    jobs.append({"id": f"{names[a]}-{names[b]}-s{seed}-{k}-{first}",
+                                 "players": {1: first, 2: second}, "opening": opening_seed})
+    return jobs
+
+
+def play_game(job, configs, size=19):
+    """Play one game in a worker. Returns the result dict for the log."""
+    from transposition import TranspositionTable
+
+    start = time.perf_counter()
+    sides = {}
+    for player, name in job["players"].items():
+        config = settings(name, configs)
+        weights = kernel_weights(*config["weights"], player)
+        sides[player] = (config, rules.Position(size, weights=weights), TranspositionTable())
+    clock = {player: sides[player][0]["clock"] for player in sides}
+
+    def play(x, y):
+        won = False
+        for _, position, _ in sides.values():
+            won = position.place(x, y)
+        return won
+
+    referee = sides[1][1]
+    moves = []
+    for x, y in random_opening(size, job["opening"]):
+        play(x, y)
+        moves.append((x, y))
+    winner, reason = 0, "draw"
+    while not referee.game_over:
+        player = referee.turn
+        config, position, tt = sides[player]
+        began = time.perf_counter()
+        result = rules.search(position, clock[player], config["clock"], config["mode"],
+                              None if config["clock"] else config["max_depth"], tt=tt,
+                              threats=config["threats"], engine=config["engine"], playouts=config["playouts"])
+        if clock[player] is not None:
+            clock[player] -= time.perf_counter() - began
+            if clock[player] <= 0:
+                winner, reason = 3 - player, "timeout"
+                break
+        for x, y in result["turn"]:
+            moves.append((x, y))
+            if play(x, y):
+                winner, reason = player, "six"
+                break
+    return {"id": job["id"], "players": job["players"], "opening": job["opening"],
+            "winner": winner, "reason": reason, "stones": len(moves),
+            "moves": " ".join(f"{x},{y}" for x, y in moves),
+            "seconds": round(time.perf_counter() - start, 2)}
+
+
+def load_results(path):
+    """Finished games in the results file; a line cut off by a crash is skipped"""
+    results = []
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            result["players"] = {int(p): name for p, name in result["players"].items()}
+            results.append(result)
+    return results
+
+
+def run(names, games, path, workers, seed, configs):
+    """Play the games missing from path, appending each as it finishes"""
+    done = {result["id"] for result in load_results(path)}
+    jobs = [job for job in schedule(names, games, seed) if job["id"] not in done]
+    print(f"{len(done)} games already played, {len(jobs)} to go on {workers} workers", file=sys.stderr)
+    if not jobs:
+        return
+    # spawn, as ai_worker: workers start clean and the same on every platform.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool, open(path, "a") as log:
+        futures = [pool.submit(play_game, job, configs) for job in jobs]
+        try:
+            for count, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                log.write(json.dumps(result) + "\n")
+                log.flush()
+                print(f"[{count}/{len(jobs)}] {result['players'][1]} vs {result['players'][2]}: "
+                      f"{result['reason']} {result['winner'] or '-'} in {result['stones']} stones "
+                      f"({result['seconds']}s)", file=sys.stderr)
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def points(result, name):
+    """1, 0.5 or 0 for name in a finished game"""
+    if not result["winner"]:
+        return 0.5
+    return 1.0 if result["players"][result["winner"]] == name else 0.0
+
+
+def elo(score):
+    """Elo difference for an expected score, clamped away from 0 and 1"""
+    score = min(max(score, 1e-3), 1 - 1e-3)
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_interval(scores):
+    """Mean score and its 95% Wilson confidence interval as (mean, low, high)"""
+    n = len(scores)
+    mean = sum(scores) / n
+    z2 = Z95 * Z95
+    centre = (mean + z2 / (2 * n)) / (1 + z2 / n)
+    half = Z95 * math.sqrt(mean * (1 - mean) / n + z2 / (4 * n * n)) / (1 + z2 / n)
+    return mean, max(centre - half, 0.0), min(centre + half, 1.0)
+
+
+def ratings(results, iterations=200):
+    """Elo rating per configuration fitted to all games, mean 0"""
+    names = sorted({name for result in results for name in result["players"].values()})
+    wins = {name: 0.0 for name in names}
+    played = {}
+    for result in results:
+        a, b = result["players"][1], result["players"][2]
+        wins[a] += points(result, a)
+        wins[b] += points(result, b)
+        played[a, b] = played.get((a, b), 0) + 1
+        played[b, a] = played.get((b, a), 0) + 1
+    strength = {name: 1.0 for name in names}
+    for _ in range(iterations):
+        for name in names:
+            total = sum(n / (strength[name] + strength[other])
+                        for (first, other), n in played.items() if first == name)
+            # A virtual draw against a strength 1 player keeps every rating finite.
+            strength[name] = (wins[name] + 0.5) / (total + 1 / (strength[name] + 1))
+    logs = {name: 400 * math.log10(value) for name, value in strength.items()}
+    mean = sum(logs.values()) / len(logs)
+    return {name: value - mean for name, value in logs.items()}
+
+
+def report(results):
+    """Tournament summary as a JSON-friendly dict"""
+    pairs = {}
+    for result in results:
+        pair = tuple(sorted(result["players"].values()))
+        pairs.setdefault(pair, []).append(result)
+    summary = {"games": len(results), "pairs": [], "ratings": {}}
+    for (a, b), games in sorted(pairs.items()):
+        scores = [points(result, a) for result in games]
+        mean, low, high = score_interval(scores)
+        summary["pairs"].append({
+            "player": a, "opponent": b, "games": len(games),
+            "wins": scores.count(1.0), "draws": scores.count(0.5), "losses": scores.count(0.0),
+            "score": round(mean, 3), "score_ci": [round(low, 3), round(high, 3)],
+            "elo": round(elo(mean)), "elo_ci": [round(elo(low)), round(elo(high))],
+            "timeouts": sum(result["reason"] == "timeout" for result in games),
+        })
+    if results:
+        summary["ratings"] = {name: round(value) for name, value in
+                              sorted(ratings(results).items(), key=lambda item: -item[1])}
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Self-play tournament between Connect6 AI configurations")
+    parser.add_argument("configs", nargs="*", help=f"configurations to pit against each other: {', '.join(CONFIGS)}")
+    parser.add_argument("--games", type=int, default=100, help="games per pairing, both colours of each opening")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0, help="opening seed; keep it to resume a run")
+    parser.add_argument("--config-file", help="JSON object of extra configurations, name -> settings")
+    parser.add_argument("--output", default=RESULTS_PATH, help="results file, appended to and resumed from")
+    parser.add_argument("--report", metavar="PATH", help="only print the report for a results file")
+    args = parser.parse_args(argv)
+
+    if args.report:
+        print(json.dumps(report(load_results(args.report)), indent=2))
+        return 0
+    configs = dict(CONFIGS)
+    if args.config_file:
+        with open(args.config_file) as f:
+            configs.update(json.load(f))
+    unknown = [name for name in args.configs if name not in configs]
+    if len(args.configs) < 2 or unknown:
+        parser.error(f"need two or more configurations from: {', '.join(configs)}")
+    try:
+        run(args.configs, args.games, args.output, args.workers, args.seed, configs)
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume", file=sys.stderr)
+    print(json.dumps(report([r for r in load_results(args.output)
+                             if set(r["players"].values()) <= set(args.configs)]), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
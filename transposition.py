@@ -0,0 +1,82 @@
+import functools
+import random
+
+# Zobrist keys and a fixed-size transposition table for the minimax search.
+
+EXACT = 0
+LOWER = 1  # score is a lower bound (the search failed high)
+UPPER = 2  # score is an upper bound (the search failed low)
+
+ZOBRIST_SEED = 0x6C6F6E67  # fixed so hashes agree between runs and processes
+
+
+@functools.lru_cache(maxsize=None)
+def zobrist_keys(size):
+    """Random 64-bit keys: keys[player][x * size + y], plus a side-to-move key"""
+    rng = random.Random(ZOBRIST_SEED + size)
+    keys = {p: [rng.getrandbits(64) for _ in range(size * size)] for p in (1, 2)}
+    side = rng.getrandbits(64)
+    return keys, side
+
+
+def board_hash(board):
+    """Zobrist hash of a board computed from scratch"""
+    size = board.shape[0]
+    keys, _ = zobrist_keys(size)
+    h = 0
+    for x, y in zip(*board.nonzero()):
+        h ^= keys[int(board[x, y])][x * size + y]
+    return h
+
+
+class TranspositionTable:
+    def __init__(self, bits=16):
+        self.mask = (1 << bits) - 1
+        self.slots = [None] * (1 << bits)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """Mark existing entries as old so they are replaced first"""
+        self.generation += 1
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+        self.hits = self.misses = self.stores = self.overwrites = 0
+
+    def probe(self, key):
+        """Return (depth, flag, score, best_move) for key, or None"""
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:5]
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, flag, score, best_move):
+        """Store a search result.
+
+        A slot holding another position is only replaced when that entry is
+        from an earlier search or was searched no deeper than this one.
+        """
+        index = key & self.mask
+        old = self.slots[index]
+        if old is not None and old[0] != key:
+            if old[5] == self.generation and old[1] > depth:
+                return
+            self.overwrites += 1
+        self.slots[index] = (key, depth, flag, score, best_move, self.generation)
+        self.stores += 1
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+        }